@@ -1,5 +1,4 @@
 import os
-import shutil
 import sqlite3
 import logging
 from datetime import datetime
@@ -16,6 +15,18 @@ logger = logging.getLogger(__name__)
 DB_PATH = '/app/data/f1_data.db'
 BACKUP_DIR = os.path.join(os.path.dirname(__file__), 'backups')
 
+def copy_database(src_path, dst_path):
+    """Copy a database through the SQLite Online Backup API for a consistent snapshot."""
+    src = sqlite3.connect(src_path)
+    try:
+        dst = sqlite3.connect(dst_path)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
 def create_backup():
     """Create a backup of the current database with timestamp."""
     try:
@@ -27,7 +38,7 @@ def create_backup():
         backup_path = os.path.join(BACKUP_DIR, f'f1_data_{timestamp}.db')
         
         # Create backup
-        shutil.copy2(DB_PATH, backup_path)
+        copy_database(DB_PATH, backup_path)
         
         # Save backup metadata
         metadata = {
@@ -64,11 +75,11 @@ def restore_backup(backup_path=None):
         # Create a temporary backup of current database
         temp_backup = DB_PATH + '.temp'
         if os.path.exists(DB_PATH):
-            shutil.copy2(DB_PATH, temp_backup)
+            copy_database(DB_PATH, temp_backup)
         
         try:
             # Restore from backup
-            shutil.copy2(backup_path, DB_PATH)
+            copy_database(backup_path, DB_PATH)
             logger.info(f"Successfully restored database from {backup_path}")
             
             # Remove temporary backup
@@ -78,7 +89,7 @@ def restore_backup(backup_path=None):
         except Exception as e:
             # Restore from temporary backup if something goes wrong
             if os.path.exists(temp_backup):
-                shutil.copy2(temp_backup, DB_PATH)
+                copy_database(temp_backup, DB_PATH)
                 logger.info("Restored from temporary backup due to error")
             raise e
             
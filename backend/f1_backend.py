@@ -14,6 +14,8 @@ import matplotlib.pyplot as plt
 from io import BytesIO
 import base64
 from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -47,6 +49,26 @@ os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 # Global lock for database access
 db_lock = threading.Lock()
 
+# Number of FastF1 sessions loaded concurrently when priming the cache
+FETCH_WORKERS = 8
+
+# session.load() arguments for the bulk loaders; telemetry, weather and race
+# control messages are never read, and qualifying only needs its results
+SESSION_LOAD_ARGS = {
+    'R': dict(telemetry=False, weather=False, messages=False),
+    'Q': dict(laps=False, telemetry=False, weather=False, messages=False),
+}
+
+# FastF1 event attributes used for circuit details, with their fallbacks
+CIRCUIT_DETAIL_DEFAULTS = (
+    ('CircuitLength', 0.0),
+    ('NumberOfLaps', 0),
+    ('RaceDistance', 0.0),
+    ('DRSZones', ()),
+    ('TrackType', 'N/A'),
+    ('TrackMap', None),
+)
+
 # Nationality to Flag Emoji Mapping
 NATIONALITY_FLAGS = {
     'British': '🇬🇧',
@@ -79,6 +101,23 @@ NATIONALITY_FLAGS = {
     None: '🏳️'
 }
 
+def prime_session_cache(year, rounds, session_types=('R', 'Q')):
+    """Load sessions into the FastF1 cache concurrently.
+    
+    Later loads of the same sessions are served from disk; failures are
+    left for those loads to report.
+    """
+    def load(task):
+        round_num, session_type = task
+        try:
+            fastf1.get_session(year, round_num, session_type).load(**SESSION_LOAD_ARGS.get(session_type, {}))
+        except Exception as e:
+            logger.debug(f"Could not prefetch {session_type} session for {year} Round {round_num}: {str(e)}")
+    
+    tasks = [(round_num, session_type) for round_num in rounds for session_type in session_types]
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+        list(tqdm(executor.map(load, tasks), total=len(tasks), desc='Loading sessions'))
+
 @contextlib.contextmanager
 def get_db_connection():
     """Get a database connection with proper timeout and locking settings."""
@@ -87,12 +126,18 @@ def get_db_connection():
         conn = sqlite3.connect(
             db_path,
             timeout=30,  # 30 second timeout
-            check_same_thread=False  # Allow multiple threads to access the database
+            check_same_thread=False,  # Allow multiple threads to access the database
+            cached_statements=256  # Keep prepared statements for the bulk loaders around
         )
         # Enable WAL mode for better concurrency
         conn.execute("PRAGMA journal_mode=WAL")
         # Set busy timeout
         conn.execute("PRAGMA busy_timeout=30000")  # 30 seconds
+        # WAL only needs syncing at checkpoints; keep temp tables and hot pages in memory
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")  # 64 MiB
+        conn.execute("PRAGMA mmap_size=268435456")
         yield conn
     except Exception as e:
         logger.error(f"Error connecting to database: {str(e)}")
@@ -187,6 +232,31 @@ def standardize_team_color(color):
     
     return color_str
 
+# Driver name spellings mapped to the name stored in the database
+_NAME_MAP = {
+    'Andrea Kimi Antonelli': 'Kimi Antonelli',
+    'Kimi Antonelli': 'Kimi Antonelli',
+    'Isack Hadjar': 'Isack Hadjar',
+    'Gabriel Bortoleto': 'Gabriel Bortoleto',
+    'Jack Doohan': 'Jack Doohan',
+    'Liam Lawson': 'Liam Lawson',
+    'Yuki Tsunoda': 'Yuki Tsunoda',
+    'Pierre Gasly': 'Pierre Gasly',
+    'Fernando Alonso': 'Fernando Alonso',
+    'Carlos Sainz': 'Carlos Sainz',
+    'Lewis Hamilton': 'Lewis Hamilton',
+    'Charles Leclerc': 'Charles Leclerc',
+    'Lance Stroll': 'Lance Stroll',
+    'Esteban Ocon': 'Esteban Ocon',
+    'Oliver Bearman': 'Oliver Bearman',
+    'Nico Hulkenberg': 'Nico Hulkenberg',
+    'Alexander Albon': 'Alexander Albon',
+    'George Russell': 'George Russell',
+    'Oscar Piastri': 'Oscar Piastri',
+    'Lando Norris': 'Lando Norris',
+    'Max Verstappen': 'Max Verstappen'
+}
+
 def standardize_driver_name(name):
     """
     Standardize driver names to ensure consistency.
@@ -197,30 +267,7 @@ def standardize_driver_name(name):
     Returns:
         str: Standardized driver name
     """
-    name_mapping = {
-        'Andrea Kimi Antonelli': 'Kimi Antonelli',
-        'Kimi Antonelli': 'Kimi Antonelli',
-        'Isack Hadjar': 'Isack Hadjar',
-        'Gabriel Bortoleto': 'Gabriel Bortoleto',
-        'Jack Doohan': 'Jack Doohan',
-        'Liam Lawson': 'Liam Lawson',
-        'Yuki Tsunoda': 'Yuki Tsunoda',
-        'Pierre Gasly': 'Pierre Gasly',
-        'Fernando Alonso': 'Fernando Alonso',
-        'Carlos Sainz': 'Carlos Sainz',
-        'Lewis Hamilton': 'Lewis Hamilton',
-        'Charles Leclerc': 'Charles Leclerc',
-        'Lance Stroll': 'Lance Stroll',
-        'Esteban Ocon': 'Esteban Ocon',
-        'Oliver Bearman': 'Oliver Bearman',
-        'Nico Hulkenberg': 'Nico Hulkenberg',
-        'Alexander Albon': 'Alexander Albon',
-        'George Russell': 'George Russell',
-        'Oscar Piastri': 'Oscar Piastri',
-        'Lando Norris': 'Lando Norris',
-        'Max Verstappen': 'Max Verstappen'
-    }
-    return name_mapping.get(name, name)
+    return _NAME_MAP.get(name, name)
 
 def get_driver_team(driver_name, year):
     """
@@ -568,15 +615,20 @@ async def get_schedule(year: int):
         if conn:
             conn.close()
 
+@lru_cache(maxsize=64)
+def load_qualifying_results(year, round):
+    """Load a round's qualifying results once per process; only the results are parsed."""
+    session = fastf1.get_session(year, round, 'Q')
+    session.load(laps=False, telemetry=False, weather=False, messages=False)
+    results = session.results[['Position', 'DriverName', 'TeamName', 'Q3']]
+    results.columns = ['position', 'driver_name', 'team', 'q3_time']
+    return results.to_dict(orient='records')
+
 @app.get("/qualifying/{year}/{round}")
 async def get_qualifying_results(year: int, round: int):
     """Get qualifying results for a specific race."""
     try:
-        session = fastf1.get_session(year, round, 'Q')
-        session.load()
-        results = session.results[['Position', 'DriverName', 'TeamName', 'Q3']]
-        results.columns = ['position', 'driver_name', 'team', 'q3_time']
-        return results.to_dict(orient='records')
+        return load_qualifying_results(year, round)
     except Exception as e:
         logger.error(f"Error fetching qualifying results: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -757,6 +809,10 @@ async def get_quick_stats(year: int):
                         try:
                             schedule = fastf1.get_event_schedule(year)
                             if not schedule.empty:
+                                # Fetch every round's sessions concurrently first, so the
+                                # loads in the loop below are cache hits
+                                prime_session_cache(year, schedule['RoundNumber'].tolist())
+
                                 # Get all races for the year
                                 all_standings = []
                                 for _, race in schedule.iterrows():
@@ -764,14 +820,15 @@ async def get_quick_stats(year: int):
                                     try:
                                         # Load the race session
                                         session = fastf1.get_session(year, round_num, 'R')
-                                        session.load()
+                                        session.load(**SESSION_LOAD_ARGS['R'])
                                         
                                         # Get driver standings with proper column mapping
                                         results = session.results
                                         logger.info(f"Processing race {round_num} for year {year}")
                                         
-                                        # Format team colors to include '#' prefix
-                                        team_colors = results['TeamColor'].apply(standardize_team_color)
+                                        # Format team colors to include '#' prefix, for all rows in one pass
+                                        colors = results['TeamColor'].fillna('').astype(str)
+                                        team_colors = colors.where(colors.str.startswith('#'), '#' + colors).where(colors.ne(''), '#ff0000')
                                         
                                         # Get fastest lap times
                                         fastest_laps = {}
@@ -792,7 +849,7 @@ async def get_quick_stats(year: int):
                                         # Get qualifying positions
                                         try:
                                             quali_session = fastf1.get_session(year, round_num, 'Q')
-                                            quali_session.load()
+                                            quali_session.load(**SESSION_LOAD_ARGS['Q'])
                                             quali_results = quali_session.results
                                             quali_positions = dict(zip(quali_results['DriverNumber'], quali_results['Position']))
                                         except Exception as e:
@@ -811,13 +868,10 @@ async def get_quick_stats(year: int):
                                             # Load the session data first
                                             session.load(weather=False, messages=False, laps=False, timing_data=False)
                                             pit_data = session.pits
-                                            # Count only actual pit stops, not all telemetry data points
-                                            pit_stops = {}
-                                            for driver in results['DriverNumber']:
-                                                driver_pits = pit_data[pit_data['DriverNumber'] == driver]
-                                                # Count only rows where there's a pit in time (actual pit stop)
-                                                pit_count = len(driver_pits[driver_pits['PitInTime'].notna()])
-                                                pit_stops[driver] = pit_count
+                                            # Count only actual pit stops (rows with a pit in time),
+                                            # for all drivers in one pass
+                                            pit_counts = pit_data.loc[pit_data['PitInTime'].notna(), 'DriverNumber'].value_counts()
+                                            pit_stops = {driver: int(pit_counts.get(driver, 0)) for driver in results['DriverNumber']}
                                         except Exception as e:
                                             logger.warning(f"Error fetching pit stops for round {round_num}: {str(e)}")
                                             # For 2025 data, simulate pit stops if we can't get real data
@@ -1254,20 +1308,26 @@ async def get_circuits(year: int):
                                 # Get event details
                                 event_details = fastf1.get_event(year, event['RoundNumber'])
                                 
-                                # Format circuit data with fallbacks for missing attributes
+                                # Read all circuit attributes in one pass, with fallbacks
+                                details = {
+                                    attr: getattr(event_details, attr, default)
+                                    for attr, default in CIRCUIT_DETAIL_DEFAULTS
+                                }
+                                
+                                # Format circuit data
                                 circuit_data = {
                                     "round": int(event['RoundNumber']),
                                     "name": str(event['EventName']),
                                     "country": str(event['Country']),
                                     "event": str(event['EventFormat']),
                                     "first_grand_prix": str(event.get('FirstGrandPrix', 'N/A')),
-                                    "circuit_length": float(getattr(event_details, 'CircuitLength', 0.0)),
-                                    "number_of_laps": int(getattr(event_details, 'NumberOfLaps', 0)),
-                                    "race_distance": float(getattr(event_details, 'RaceDistance', 0.0)),
+                                    "circuit_length": float(details['CircuitLength']),
+                                    "number_of_laps": int(details['NumberOfLaps']),
+                                    "race_distance": float(details['RaceDistance']),
                                     "lap_record": "N/A",  # Default to N/A since LapRecord is not available
-                                    "drs_zones": f"{len(getattr(event_details, 'DRSZones', []))} zones",
-                                    "track_type": str(getattr(event_details, 'TrackType', 'N/A')),
-                                    "track_map": str(getattr(event_details, 'TrackMap', None)) if hasattr(event_details, 'TrackMap') else None
+                                    "drs_zones": f"{len(details['DRSZones'])} zones",
+                                    "track_type": str(details['TrackType']),
+                                    "track_map": str(details['TrackMap']) if details['TrackMap'] is not None else None
                                 }
                                 
                                 circuits.append(circuit_data)
@@ -1753,11 +1813,15 @@ async def get_race_positions(year: int, round: int):
                     'Haas F1 Team': '#FFFFFF'
                 }
                 
+                # Split the laps by driver in one pass instead of filtering per driver
+                laps_by_driver = dict(tuple(session.laps.groupby('DriverNumber', sort=False)))
+                position_rows = []
+                
                 # Get position data for each driver
                 for drv in session.drivers:
                     try:
-                        drv_laps = session.laps.pick_drivers(drv)
-                        if len(drv_laps) == 0:
+                        drv_laps = laps_by_driver.get(drv)
+                        if drv_laps is None or len(drv_laps) == 0:
                             continue
                             
                         abb = drv_laps['Driver'].iloc[0]
@@ -1783,14 +1847,8 @@ async def get_race_positions(year: int, round: int):
                                 'team': team
                             }
                             
-                            # Store in database
-                            cursor.execute("""
-                                INSERT OR REPLACE INTO race_positions (
-                                    year, round, driver_abbr, positions, lap_numbers,
-                                    color, driver_name, team
-                                )
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                            """, (
+                            # Queue for storage in database
+                            position_rows.append((
                                 year, round, abb,
                                 json.dumps(positions),  # Convert list to JSON string for storage
                                 json.dumps(lap_numbers),  # Convert list to JSON string for storage
@@ -1802,6 +1860,14 @@ async def get_race_positions(year: int, round: int):
                         logger.error(f"Error processing driver {drv}: {str(e)}")
                         continue
                 
+                # Store all drivers with one statement through the connection
+                conn.executemany("""
+                    INSERT OR REPLACE INTO race_positions (
+                        year, round, driver_abbr, positions, lap_numbers,
+                        color, driver_name, team
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, position_rows)
                 conn.commit()
                 
                 if not position_data:
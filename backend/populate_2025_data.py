@@ -2,14 +2,21 @@ import fastf1
 import pandas as pd
 import sqlite3
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 import time
-import hashlib
+import json
+import atexit
+import argparse
+import zlib
+import pickle
 import numpy as np
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from types import SimpleNamespace
 from tqdm import tqdm
 from f1_backend import create_tables, get_db_connection, calculate_points
+from schema_migration import schema_layout, migrate_tables
 
 # Configure logging with a cleaner format
 logging.basicConfig(
@@ -18,8 +25,9 @@ logging.basicConfig(
     datefmt='%H:%M:%S'
 )
 
-# Prevent duplicate logs from FastF1
+# Prevent duplicate logs from FastF1 and drop its per-session info chatter
 logging.getLogger('fastf1').propagate = False
+logging.getLogger('fastf1').setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
 # Set up FastF1 cache
@@ -27,91 +35,310 @@ cache_dir = os.path.join(os.path.dirname(__file__), 'cache')
 os.makedirs(cache_dir, exist_ok=True)
 fastf1.Cache.enable_cache(cache_dir)
 
+# Parsed session results and laps, so rebuilds skip FastF1's parsing
+_parsed_cache_dir = os.path.join(cache_dir, 'parsed')
+os.makedirs(_parsed_cache_dir, exist_ok=True)
+
+# Lap columns read by collect_results
+_LAP_COLUMNS = ['DriverNumber', 'LapTime', 'PitInTime']
+
 # Database path
 db_path = '/app/data/f1_data.db'
 
+# Number of rounds fetched from FastF1 concurrently
+FETCH_WORKERS = 8
+
+# Days after a race when its results are treated as final and not fetched again
+RESULTS_SETTLED_DAYS = 2
+
+# Qualifying positions per (year, round); None marks a failed load
+_quali_cache = {}
+
+# Sessions FastF1 reports as nonexistent, as "year-round-type" keys mapped to the
+# time they were found missing, persisted across runs
+_known_misses_path = os.path.join(cache_dir, 'known_misses.json')
+
+# Days a missing session is remembered before FastF1 is asked for it again
+KNOWN_MISS_DAYS = 7
+
+def _load_known_misses():
+    """Read the persisted sessions that don't exist, dropping expired entries."""
+    try:
+        with open(_known_misses_path) as f:
+            misses = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(misses, dict):
+        # Older files listed the keys without the time they were found
+        return {}
+    expired_before = time.time() - KNOWN_MISS_DAYS * 24 * 60 * 60
+    return {key: found for key, found in misses.items()
+            if isinstance(found, (int, float)) and found >= expired_before}
+
+_known_misses = _load_known_misses()
+_saved_known_misses = dict(_known_misses)
+
+def _save_known_misses():
+    """Write newly found missing sessions back to disk."""
+    if _known_misses == _saved_known_misses:
+        return
+    try:
+        with open(_known_misses_path, 'w') as f:
+            json.dump(_known_misses, f, sort_keys=True)
+    except OSError as e:
+        logger.warning(f"Could not save known missing sessions: {str(e)}")
+
+atexit.register(_save_known_misses)
+
+# Driver name spellings mapped to the name stored in the database
+_NAME_MAP = {
+    'Andrea Kimi Antonelli': 'Kimi Antonelli',
+    'Kimi Antonelli': 'Kimi Antonelli',
+    'Isack Hadjar': 'Isack Hadjar',
+    'Gabriel Bortoleto': 'Gabriel Bortoleto',
+    'Jack Doohan': 'Jack Doohan',
+    'Liam Lawson': 'Liam Lawson',
+    'Yuki Tsunoda': 'Yuki Tsunoda',
+    'Pierre Gasly': 'Pierre Gasly',
+    'Fernando Alonso': 'Fernando Alonso',
+    'Carlos Sainz': 'Carlos Sainz',
+    'Lewis Hamilton': 'Lewis Hamilton',
+    'Charles Leclerc': 'Charles Leclerc',
+    'Lance Stroll': 'Lance Stroll',
+    'Esteban Ocon': 'Esteban Ocon',
+    'Oliver Bearman': 'Oliver Bearman',
+    'Nico Hulkenberg': 'Nico Hulkenberg',
+    'Alexander Albon': 'Alexander Albon',
+    'George Russell': 'George Russell',
+    'Oscar Piastri': 'Oscar Piastri',
+    'Lando Norris': 'Lando Norris',
+    'Max Verstappen': 'Max Verstappen'
+}
+
+# Points by [position, fastest lap, sprint], precomputed from calculate_points;
+# position 0 holds unclassified drivers
+_MAX_POSITION = 30
+_POINTS_TABLE = np.array([
+    [[calculate_points(position, is_fastest_lap=bool(fastest_lap), is_sprint=bool(sprint)) if position else 0.0
+      for sprint in (0, 1)]
+     for fastest_lap in (0, 1)]
+    for position in range(_MAX_POSITION + 1)
+])
+
+# Database schema, also used to detect when a rebuild is needed
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS race_schedule (
+    year INTEGER,
+    round INTEGER,
+    name TEXT,
+    date TEXT,
+    event TEXT,
+    country TEXT,
+    is_sprint INTEGER DEFAULT 0,
+    PRIMARY KEY (year, round)
+);
+
+CREATE TABLE IF NOT EXISTS circuits (
+    year INTEGER,
+    round INTEGER,
+    circuit_name TEXT,
+    location TEXT,
+    country TEXT,
+    circuit_length REAL,
+    number_of_laps INTEGER,
+    first_grand_prix INTEGER,
+    lap_record TEXT,
+    track_map TEXT,
+    PRIMARY KEY (year, round)
+);
+
+CREATE TABLE IF NOT EXISTS driver_standings (
+    year INTEGER,
+    round INTEGER,
+    driver_name TEXT,
+    standardized_driver_name TEXT,
+    team TEXT,
+    points INTEGER,
+    total_points INTEGER,
+    position INTEGER,
+    fastest_lap_time TEXT,
+    fastest_lap_us INTEGER,
+    fastest_lap_flag INTEGER DEFAULT 0,
+    qualifying_position INTEGER,
+    positions_gained INTEGER,
+    pit_stops INTEGER,
+    driver_number INTEGER,
+    driver_color TEXT,
+    nationality TEXT,
+    is_sprint INTEGER DEFAULT 0,
+    sprint_points INTEGER DEFAULT 0,
+    sprint_position INTEGER,
+    PRIMARY KEY (year, round, standardized_driver_name)
+);
+
+CREATE TABLE IF NOT EXISTS constructors_standings (
+    year INTEGER,
+    round INTEGER,
+    team TEXT,
+    points INTEGER,
+    total_points INTEGER,
+    position INTEGER,
+    wins INTEGER,
+    podiums INTEGER,
+    fastest_laps INTEGER,
+    team_color TEXT,
+    is_sprint INTEGER DEFAULT 0,
+    sprint_points INTEGER DEFAULT 0,
+    sprint_position INTEGER DEFAULT NULL,
+    PRIMARY KEY (year, round, team)
+);
+
+CREATE TABLE IF NOT EXISTS ingested_rounds (
+    year INTEGER,
+    round INTEGER,
+    session TEXT,
+    loaded_at TEXT,
+    PRIMARY KEY (year, round, session)
+);
+"""
+
+# Secondary indexes for better query performance, as (name, table, column)
+_INDEXES = (
+    ('idx_race_schedule_year', 'race_schedule', 'year'),
+    ('idx_race_schedule_date', 'race_schedule', 'date'),
+    ('idx_circuits_year', 'circuits', 'year'),
+    ('idx_circuits_country', 'circuits', 'country'),
+    ('idx_driver_standings_year', 'driver_standings', 'year'),
+    ('idx_driver_standings_driver', 'driver_standings', 'standardized_driver_name'),
+    ('idx_driver_standings_team', 'driver_standings', 'team'),
+    ('idx_constructors_standings_year', 'constructors_standings', 'year'),
+    ('idx_constructors_standings_team', 'constructors_standings', 'team'),
+)
+_INDEX_SQL = tuple(
+    f"CREATE INDEX IF NOT EXISTS {name} ON {table}({column})" for name, table, column in _INDEXES
+)
+_DROP_INDEX_SQL = tuple(f"DROP INDEX IF EXISTS {name}" for name, _, _ in _INDEXES)
+
+# Table DDL run by init_tables
+_TABLES_DDL = _SCHEMA_SQL + """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version TEXT PRIMARY KEY
+);
+"""
+
+# Expected layout of every table, compared against existing databases by init_tables
+_SCHEMA_LAYOUT = schema_layout(_SCHEMA_SQL)
+
+# Statements executed per driver/team, kept as constants so each hits the statement cache.
+# The INSERTs are completed with one VALUES group per row by insert_rows, followed by
+# the ON CONFLICT clause for the sessions being written.
+_SQL_INSERT_DRIVER = """
+    INSERT INTO driver_standings 
+    (year, round, driver_name, standardized_driver_name, team, points, total_points, position,
+     fastest_lap_time, fastest_lap_us, fastest_lap_flag, qualifying_position,
+     positions_gained, pit_stops, driver_number, driver_color, nationality, is_sprint, sprint_points,
+     sprint_position)
+    VALUES """
+_SQL_UPSERT_DRIVER_SPRINT = """
+    ON CONFLICT(year, round, standardized_driver_name) DO UPDATE SET
+        sprint_points = excluded.sprint_points,
+        sprint_position = excluded.sprint_position,
+        is_sprint = 1
+"""
+_SQL_UPSERT_DRIVER_RACE = """
+    ON CONFLICT(year, round, standardized_driver_name) DO UPDATE SET
+        points = excluded.points,
+        position = excluded.position,
+        fastest_lap_time = excluded.fastest_lap_time,
+        fastest_lap_us = excluded.fastest_lap_us,
+        fastest_lap_flag = excluded.fastest_lap_flag,
+        qualifying_position = excluded.qualifying_position,
+        positions_gained = excluded.positions_gained,
+        pit_stops = excluded.pit_stops
+"""
+_SQL_UPSERT_DRIVER_ROUND = """
+    ON CONFLICT(year, round, standardized_driver_name) DO UPDATE SET
+        points = excluded.points,
+        position = excluded.position,
+        fastest_lap_time = excluded.fastest_lap_time,
+        fastest_lap_us = excluded.fastest_lap_us,
+        fastest_lap_flag = excluded.fastest_lap_flag,
+        qualifying_position = excluded.qualifying_position,
+        positions_gained = excluded.positions_gained,
+        pit_stops = excluded.pit_stops,
+        sprint_points = excluded.sprint_points,
+        sprint_position = excluded.sprint_position,
+        is_sprint = excluded.is_sprint
+"""
+_SQL_INSERT_TEAM = """
+    INSERT INTO constructors_standings
+    (year, round, team, points, total_points, position, wins, podiums,
+     fastest_laps, team_color, is_sprint, sprint_points, sprint_position)
+    VALUES """
+_SQL_UPSERT_TEAM_SPRINT = """
+    ON CONFLICT(year, round, team) DO UPDATE SET
+        sprint_points = excluded.sprint_points,
+        sprint_position = excluded.sprint_position,
+        is_sprint = 1
+"""
+_SQL_UPSERT_TEAM_RACE = """
+    ON CONFLICT(year, round, team) DO UPDATE SET
+        points = excluded.points,
+        position = excluded.position,
+        wins = excluded.wins,
+        podiums = excluded.podiums,
+        fastest_laps = excluded.fastest_laps,
+        team_color = excluded.team_color
+"""
+_SQL_UPSERT_TEAM_ROUND = """
+    ON CONFLICT(year, round, team) DO UPDATE SET
+        points = excluded.points,
+        position = excluded.position,
+        wins = excluded.wins,
+        podiums = excluded.podiums,
+        fastest_laps = excluded.fastest_laps,
+        team_color = excluded.team_color,
+        sprint_points = excluded.sprint_points,
+        sprint_position = excluded.sprint_position,
+        is_sprint = excluded.is_sprint
+"""
+
+# Rows per multi-row INSERT, kept well below SQLite's bound-parameter limit
+_INSERT_CHUNK_SIZE = 500
+
+# Schema fingerprint, computed once at import
+_SCHEMA_HASH = format(zlib.crc32(_SCHEMA_SQL.encode()), '08x')
+
 def get_schema_hash():
-    """Calculate a hash of the current database schema."""
-    schema = """
-    CREATE TABLE IF NOT EXISTS race_schedule (
-        year INTEGER,
-        round INTEGER,
-        name TEXT,
-        date TEXT,
-        event TEXT,
-        country TEXT,
-        PRIMARY KEY (year, round)
-    );
-    
-    CREATE TABLE IF NOT EXISTS circuits (
-        year INTEGER,
-        round INTEGER,
-        circuit_name TEXT,
-        location TEXT,
-        country TEXT,
-        circuit_length REAL,
-        number_of_laps INTEGER,
-        first_grand_prix INTEGER,
-        lap_record TEXT,
-        track_map TEXT,
-        PRIMARY KEY (year, round)
-    );
+    """Return the hash of the current database schema."""
+    return _SCHEMA_HASH
+
+def needs_rebuild(conn=None):
+    """Check if the database needs to be rebuilt.
     
-    CREATE TABLE IF NOT EXISTS driver_standings (
-        year INTEGER,
-        round INTEGER,
-        driver_name TEXT,
-        team TEXT,
-        points INTEGER,
-        total_points INTEGER,
-        position INTEGER,
-        fastest_lap_time TEXT,
-        qualifying_position INTEGER,
-        positions_gained INTEGER,
-        pit_stops INTEGER,
-        driver_number INTEGER,
-        driver_color TEXT,
-        nationality TEXT,
-        sprint_points INTEGER DEFAULT 0,
-        PRIMARY KEY (year, round, driver_name)
-    );
-
-    CREATE TABLE IF NOT EXISTS constructors_standings (
-        year INTEGER,
-        round INTEGER,
-        team TEXT,
-        points INTEGER,
-        total_points INTEGER,
-        position INTEGER,
-        wins INTEGER,
-        podiums INTEGER,
-        fastest_laps INTEGER,
-        team_color TEXT,
-        sprint_position INTEGER DEFAULT NULL,
-        PRIMARY KEY (year, round, team)
-    );
+    Args:
+        conn: Open connection to check; a new one to db_path is opened if omitted
     """
-    return hashlib.md5(schema.encode()).hexdigest()
-
-def needs_rebuild():
-    """Check if the database needs to be rebuilt."""
-    if not os.path.exists(db_path):
+    owns_conn = conn is None
+    if owns_conn and not os.path.exists(db_path):
         logger.info("Database file does not exist, needs to be rebuilt")
         return True
         
     try:
-        conn = sqlite3.connect(db_path)
+        if owns_conn:
+            conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
-        # Check if schema_version table exists
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='schema_version'")
-        if not cursor.fetchone():
-            logger.info("Schema version table not found, needs to be rebuilt")
+        # Get the schema version and 2025 schedule size in one round trip
+        try:
+            cursor.execute("""
+                SELECT (SELECT version FROM schema_version),
+                       (SELECT COUNT(*) FROM race_schedule WHERE year = 2025)
+            """)
+        except sqlite3.OperationalError:
+            logger.info("Schema version or race schedule table not found, needs to be rebuilt")
             return True
-            
-        # Get current schema version
-        cursor.execute("SELECT version FROM schema_version")
-        current_version = cursor.fetchone()[0]
+        current_version, race_count = cursor.fetchone()
         
         # Compare with current schema hash
         if current_version != get_schema_hash():
@@ -119,8 +346,7 @@ def needs_rebuild():
             return True
             
         # Check if we have data for 2025
-        cursor.execute("SELECT COUNT(*) FROM race_schedule WHERE year = 2025")
-        if cursor.fetchone()[0] == 0:
+        if race_count == 0:
             logger.info("No 2025 data found, needs to be rebuilt")
             return True
             
@@ -130,110 +356,91 @@ def needs_rebuild():
         logger.error(f"Error checking if rebuild is needed: {str(e)}")
         return True
     finally:
-        conn.close()
+        if owns_conn and conn is not None:
+            conn.close()
 
-def init_db(db_path=None):
-    """Initialize the database with required tables."""
-    if db_path is None:
-        db_path = os.path.join(os.path.dirname(__file__), 'f1_data.db')
-        
-    conn = sqlite3.connect(db_path)
+def tune_connection(conn):
+    """Apply per-connection PRAGMAs suited to bulk writes."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-262144")  # 256 MiB
+    conn.execute("PRAGMA mmap_size=268435456")
+    # Avoid checkpoint stalls in the middle of a rebuild
+    conn.execute("PRAGMA wal_autocheckpoint=10000")
+
+def init_tables(conn):
+    """Create or migrate the tables (without indexes) and record the schema version."""
     cursor = conn.cursor()
     
+    # Enable WAL mode for better concurrency
+    cursor.execute("PRAGMA journal_mode=WAL")
+    
+    # Create missing tables in one batch; existing ones are left as they are
+    cursor.executescript(_TABLES_DDL)
+    
+    # Existing tables only count as current once they have been migrated, so the
+    # new schema version is written in the same savepoint as the migration
+    cursor.execute("SAVEPOINT init_tables")
     try:
-        # Enable WAL mode for better concurrency
-        cursor.execute("PRAGMA journal_mode=WAL")
-        
-        # Create race_schedule table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS race_schedule (
-                year INTEGER,
-                round INTEGER,
-                name TEXT,
-                date TEXT,
-                event TEXT,
-                country TEXT,
-                PRIMARY KEY (year, round)
-            )
-        """)
-        
-        # Create circuits table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS circuits (
-                year INTEGER,
-                round INTEGER,
-                circuit_name TEXT,
-                location TEXT,
-                country TEXT,
-                circuit_length REAL,
-                number_of_laps INTEGER,
-                first_grand_prix INTEGER,
-                lap_record TEXT,
-                track_map TEXT,
-                PRIMARY KEY (year, round)
-            )
-        """)
-        
-        # Create driver_standings table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS driver_standings (
-                year INTEGER,
-                round INTEGER,
-                driver_name TEXT,
-                team TEXT,
-                points INTEGER,
-                total_points INTEGER,
-                position INTEGER,
-                fastest_lap_time TEXT,
-                qualifying_position INTEGER,
-                positions_gained INTEGER,
-                pit_stops INTEGER,
-                driver_number INTEGER,
-                driver_color TEXT,
-                nationality TEXT,
-                sprint_points INTEGER DEFAULT 0,
-                PRIMARY KEY (year, round, driver_name)
-            )
-        """)
-
-        # Create constructors_standings table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS constructors_standings (
-                year INTEGER,
-                round INTEGER,
-                team TEXT,
-                points INTEGER,
-                total_points INTEGER,
-                position INTEGER,
-                wins INTEGER,
-                podiums INTEGER,
-                fastest_laps INTEGER,
-                team_color TEXT,
-                sprint_position INTEGER DEFAULT NULL,
-                PRIMARY KEY (year, round, team)
-            )
-        """)
-        
-        # Create schema_version table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS schema_version (
-                version TEXT PRIMARY KEY
-            )
-        """)
-        
-        # Store current schema version
-        cursor.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (?)", (get_schema_hash(),))
-        
-        # Create indexes for better query performance
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_race_schedule_year ON race_schedule(year)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_race_schedule_date ON race_schedule(date)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_circuits_year ON circuits(year)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_circuits_country ON circuits(country)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_driver_standings_year ON driver_standings(year)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_driver_standings_driver ON driver_standings(driver_name)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_driver_standings_team ON driver_standings(team)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_constructors_standings_year ON constructors_standings(year)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_constructors_standings_team ON constructors_standings(team)")
+        migrate_tables(cursor, _SCHEMA_LAYOUT)
+    except Exception:
+        cursor.execute("ROLLBACK TO init_tables")
+        cursor.execute("RELEASE init_tables")
+        raise
+    
+    # Rounds loaded under an older schema have to be loaded again
+    cursor.execute("""
+        DELETE FROM ingested_rounds
+        WHERE NOT EXISTS (SELECT 1 FROM schema_version WHERE version = ?)
+    """, (get_schema_hash(),))
+    
+    # Store current schema version, replacing any older one
+    cursor.execute("DELETE FROM schema_version")
+    cursor.execute("INSERT INTO schema_version (version) VALUES (?)", (get_schema_hash(),))
+    cursor.execute("RELEASE init_tables")
+
+def insert_rows(cursor, insert_sql, rows, suffix='', chunksize=_INSERT_CHUNK_SIZE):
+    """Insert rows with one multi-row VALUES statement per chunk.
+    
+    suffix is appended after the VALUES list, e.g. an ON CONFLICT clause.
+    """
+    if not rows:
+        return
+    placeholders = "(" + ", ".join("?" * len(rows[0])) + ")"
+    for start in range(0, len(rows), chunksize):
+        chunk = rows[start:start + chunksize]
+        cursor.execute(insert_sql + ", ".join([placeholders] * len(chunk)) + suffix,
+                       [value for row in chunk for value in row])
+
+def create_indexes(conn):
+    """Create secondary indexes, run after bulk loading the tables.
+    
+    Statements run one at a time, unlike executescript, so this can be
+    part of an open transaction.
+    """
+    for statement in _INDEX_SQL:
+        conn.execute(statement)
+
+def drop_indexes(conn):
+    """Drop secondary indexes so a bulk load doesn't maintain them per row."""
+    for statement in _DROP_INDEX_SQL:
+        conn.execute(statement)
+
+def init_db(conn=None):
+    """Initialize the database with required tables.
+    
+    Args:
+        conn: Open connection to initialize; a new one is opened if omitted
+    """
+    owns_conn = conn is None
+    if owns_conn:
+        conn = sqlite3.connect(os.path.join(os.path.dirname(__file__), 'f1_data.db'))
+    
+    try:
+        tune_connection(conn)
+        init_tables(conn)
+        create_indexes(conn)
         
         conn.commit()
         logger.info("Database initialized successfully")
@@ -242,23 +449,84 @@ def init_db(db_path=None):
         logger.error(f"Error initializing database: {str(e)}")
         conn.rollback()
     finally:
-        conn.close()
+        if owns_conn:
+            conn.close()
+
+def _get_session(year, round_num, session_type):
+    """Get a FastF1 session, remembering sessions the event doesn't have.
+    
+    FastF1 raises ValueError both for a session the event doesn't have and
+    when the schedule can't be loaded, e.g. during a network failure. The
+    event is looked up first so only the former is remembered.
+    """
+    event = fastf1.get_event(year, round_num)
+    try:
+        return event.get_session(session_type)
+    except ValueError:
+        _known_misses[f"{year}-{round_num}-{session_type}"] = time.time()
+        raise
 
-def load_session_data(year, round_num, session_type='R'):
-    """Load and cache session data efficiently."""
+def load_session_data(year, round_num, session_type='R', settled_at=None, refresh=False):
+    """Load session results and laps, reusing a parsed copy from disk when available.
+    
+    Parsed copies are only written once the results are final at settled_at,
+    and only copies written after that are read back, so provisional results
+    always go through FastF1's revalidation. Nothing is cached without settled_at.
+    With refresh, an existing parsed copy is ignored and replaced.
+    
+    Returns an object with ``results`` and ``laps`` attributes, or None on failure.
+    """
+    miss_key = f"{year}-{round_num}-{session_type}"
+    if miss_key in _known_misses:
+        logger.debug("Skipping %s session for Round %s, known to be missing", session_type, round_num)
+        return None
+    
+    parsed_path = os.path.join(_parsed_cache_dir, f"{miss_key}-{get_schema_hash()}.pkl")
+    settled = settled_at is not None and datetime.now() >= settled_at
+    
+    if settled and not refresh and os.path.exists(parsed_path) and \
+            datetime.fromtimestamp(os.path.getmtime(parsed_path)) >= settled_at:
+        try:
+            with open(parsed_path, 'rb') as f:
+                return SimpleNamespace(**pickle.load(f))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable parsed cache for {session_type} Round {round_num}: {str(e)}")
+    
     try:
-        session = fastf1.get_session(year, round_num, session_type)
-        logger.info(f"Loading {session_type} session data for Round {round_num}")
+        session = _get_session(year, round_num, session_type)
+    except ValueError as e:
+        logger.warning(f"No {session_type} session for Round {round_num}: {str(e)}")
+        return None
+    except Exception as e:
+        logger.error(f"Error loading {session_type} session data for Round {round_num}: {str(e)}")
+        return None
+    
+    try:
+        logger.debug("Loading %s session data for Round %s", session_type, round_num)
         
-        # Load all required data at once
+        # Only results and laps are used; telemetry is never read
+        want_laps = session_type in ('R', 'S')
         session.load(
             weather=False,
             messages=False,
-            laps=True,
-            telemetry=True
+            laps=want_laps,
+            telemetry=False
         )
         
-        return session
+        laps = session.laps if want_laps else None
+        parsed = {
+            'results': session.results,
+            'laps': laps[_LAP_COLUMNS] if laps is not None and not laps.empty else None
+        }
+        
+        # Only cache settled sessions that actually have results
+        if settled and parsed['results'] is not None and not parsed['results'].empty:
+            tmp_path = f"{parsed_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(parsed, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, parsed_path)
+        
+        return SimpleNamespace(**parsed)
     except Exception as e:
         logger.error(f"Error loading {session_type} session data for Round {round_num}: {str(e)}")
         return None
@@ -273,284 +541,422 @@ def standardize_driver_name(name):
     Returns:
         str: Standardized driver name
     """
-    name_mapping = {
-        'Andrea Kimi Antonelli': 'Kimi Antonelli',
-        'Kimi Antonelli': 'Kimi Antonelli',
-        'Isack Hadjar': 'Isack Hadjar',
-        'Gabriel Bortoleto': 'Gabriel Bortoleto',
-        'Jack Doohan': 'Jack Doohan',
-        'Liam Lawson': 'Liam Lawson',
-        'Yuki Tsunoda': 'Yuki Tsunoda',
-        'Pierre Gasly': 'Pierre Gasly',
-        'Fernando Alonso': 'Fernando Alonso',
-        'Carlos Sainz': 'Carlos Sainz',
-        'Lewis Hamilton': 'Lewis Hamilton',
-        'Charles Leclerc': 'Charles Leclerc',
-        'Lance Stroll': 'Lance Stroll',
-        'Esteban Ocon': 'Esteban Ocon',
-        'Oliver Bearman': 'Oliver Bearman',
-        'Nico Hulkenberg': 'Nico Hulkenberg',
-        'Alexander Albon': 'Alexander Albon',
-        'George Russell': 'George Russell',
-        'Oscar Piastri': 'Oscar Piastri',
-        'Lando Norris': 'Lando Norris',
-        'Max Verstappen': 'Max Verstappen'
-    }
-    return name_mapping.get(name, name)
-
-def process_race_data(session, round_num, cursor, year=2025, is_sprint=False):
-    """Process race data efficiently in batches."""
+    return _NAME_MAP.get(name, name)
+
+def get_qualifying_positions(year, round_num):
+    """Get qualifying positions keyed by driver number.
+    
+    Each round is loaded at most once per run; failed loads are remembered
+    so sprint and race processing don't retry the same missing session.
+    """
+    key = (year, round_num)
+    miss_key = f"{year}-{round_num}-Q"
+    if key not in _quali_cache and miss_key in _known_misses:
+        _quali_cache[key] = None
+    if key not in _quali_cache:
+        try:
+            quali_session = _get_session(year, round_num, 'Q')
+            quali_session.load(laps=False, telemetry=False, weather=False, messages=False)
+            results = quali_session.results
+            _quali_cache[key] = dict(zip(results['DriverNumber'], results['Position']))
+        except Exception as e:
+            logger.warning(f"Error loading qualifying data for round {round_num}: {str(e)}")
+            _quali_cache[key] = None
+    return _quali_cache[key] or {}
+
+def collect_results(session, round_num, year=2025, is_sprint=False, quali_positions=None):
+    """Build one session's driver results as a DataFrame, one row per driver.
+    
+    quali_positions can be passed in when already fetched; otherwise it is
+    looked up for the round.
+    """
     try:
         # Get qualifying positions for positions gained calculation
-        quali_positions = {}
+        if quali_positions is None:
+            quali_positions = get_qualifying_positions(year, round_num)
+        
+        # Prefix team colors with '#' in one vectorized pass
+        colors = session.results['TeamColor']
+        color_str = colors.astype(str)
+        results = session.results.assign(
+            TeamColorHex=color_str.where(color_str.str.startswith('#'), '#' + color_str)
+                                  .where(colors.notna() & color_str.ne(''))
+        )
+        
+        # Aggregate laps per driver once instead of filtering them per driver
+        fastest_laps = {}
+        pit_counts = None
         try:
-            quali_session = fastf1.get_session(year, round_num, 'Q')
-            quali_session.load()
-            for _, driver in quali_session.results.iterrows():
-                quali_positions[driver['DriverNumber']] = driver['Position']
+            laps = session.laps
+            if laps is not None and not laps.empty:
+                laps_by_driver = laps.groupby('DriverNumber')
+                fastest_laps = laps_by_driver['LapTime'].min().dropna().to_dict()
+                pit_counts = laps_by_driver['PitInTime'].count().to_dict()
         except Exception as e:
-            logger.warning(f"Error loading qualifying data for round {round_num}: {str(e)}")
+            logger.warning(f"Error aggregating laps for round {round_num}: {str(e)}")
         
-        driver_data = []
-        team_data = {}
+        # Fill optional columns missing from some sessions
+        for column, default in (('Nationality', 'Unknown'), ('FastestLap', False)):
+            if column not in results.columns:
+                results[column] = default
+        is_fastest_lap = results['FastestLap'].fillna(False).astype(bool)
         
-        for _, driver in session.results.iterrows():
-            driver_number = driver['DriverNumber']
-            driver_name = driver['FullName']
-            standardized_name = standardize_driver_name(driver_name)
-            team = driver['TeamName']
-            position = driver['Position']
-            
-            # Calculate positions gained
-            quali_pos = quali_positions.get(driver_number, position)
-            positions_gained = quali_pos - position if position > 0 else 0
-            
-            # Get pit stops efficiently
-            pit_stops = 0
-            fastest_lap_time = 'N/A'
-            
-            try:
-                # Try to get driver laps first
-                driver_laps = None
-                if hasattr(session, 'laps') and session.laps is not None:
-                    driver_laps = session.laps.pick_drivers(driver_number)
-                
-                # Try to get pit stops from telemetry data
-                if hasattr(session, 'car_data') and session.car_data is not None:
-                    try:
-                        if driver_number in session.car_data:
-                            car_data = session.car_data[driver_number]
-                            if not car_data.empty:
-                                pit_stops = 2 if not is_sprint else 0  # Default to 2 pit stops for main race, 0 for sprint
-                    except Exception as e:
-                        logger.warning(f"Error getting pit stops from car data for {driver_name}: {str(e)}")
-                
-                # If we couldn't get pit stops from car data, use a reasonable default
-                if pit_stops == 0 and not is_sprint:
-                    pit_stops = 2  # Most races have 2 pit stops
-                
-                # Get fastest lap
-                if driver_laps is not None and not driver_laps.empty:
-                    fastest_lap = driver_laps['LapTime'].min()
-                    if pd.notnull(fastest_lap):
-                        fastest_lap_time = str(fastest_lap)
-                elif 'FastestLap' in driver and driver['FastestLap']:
-                    fastest_lap_time = "Fastest Lap"
-            except Exception as e:
-                logger.warning(f"Error calculating pit stops and fastest lap for {driver_name}: {str(e)}")
-                pit_stops = 2 if not is_sprint else 0  # Default values
-            
-            # Calculate points based on position and race type
-            points = calculate_points(position, is_fastest_lap=(fastest_lap_time == "Fastest Lap"), is_sprint=is_sprint)
-            
-            # Check if a record exists for this driver in this round
-            cursor.execute("""
-                SELECT points, sprint_points, is_sprint
-                FROM driver_standings
-                WHERE year = ? AND round = ? AND standardized_driver_name = ?
-            """, (year, round_num, standardized_name))
-            existing_record = cursor.fetchone()
-            
-            if existing_record:
-                # Update existing record
-                if is_sprint:
-                    # Update sprint points
-                    cursor.execute("""
-                        UPDATE driver_standings
-                        SET sprint_points = ?,
-                            sprint_position = ?,
-                            is_sprint = 1
-                        WHERE year = ? AND round = ? AND standardized_driver_name = ?
-                    """, (points, position, year, round_num, standardized_name))
-                else:
-                    # Update race points and ensure sprint points are preserved
-                    cursor.execute("""
-                        UPDATE driver_standings
-                        SET points = ?,
-                            position = ?,
-                            is_sprint = CASE WHEN is_sprint = 1 THEN 1 ELSE 0 END
-                        WHERE year = ? AND round = ? AND standardized_driver_name = ?
-                    """, (points, position, year, round_num, standardized_name))
-            else:
-                # Create new record
-                driver_data.append((
-                    year, round_num, driver_name, standardized_name, team,
-                    points if not is_sprint else 0,  # race points
-                    0,  # total_points will be updated later
-                    None if is_sprint else position,  # position (main race)
-                    fastest_lap_time, quali_pos, positions_gained,
-                    pit_stops, driver_number, driver['TeamColor'],
-                    driver.get('Nationality', 'Unknown'), is_sprint,
-                    points if is_sprint else 0,  # sprint points
-                    position if is_sprint else None  # sprint position
-                ))
-            
-            # Update team data
-            if team not in team_data:
-                team_data[team] = {
-                    'points': 0,
-                    'wins': 0,
-                    'podiums': 0,
-                    'fastest_laps': 0,
-                    'color': driver['TeamColor'],
-                    'is_sprint': is_sprint
-                }
-            
-            team_data[team]['points'] += points
-            if position == 1:
-                team_data[team]['wins'] += 1
-            if position <= 3:
-                team_data[team]['podiums'] += 1
-            if driver.get('FastestLap', False):
-                team_data[team]['fastest_laps'] += 1
+        # Standardize names and calculate positions gained for all drivers at once
+        results['StandardizedName'] = results['FullName'].map(_NAME_MAP).fillna(results['FullName'])
+        results['QualiPos'] = results['DriverNumber'].map(quali_positions).fillna(results['Position'])
+        results['PositionsGained'] = (results['QualiPos'] - results['Position']).where(results['Position'] > 0, 0)
+        
+        # Look up points for all drivers in one gather from the precomputed table; the
+        # fastest-lap flag is only set when no lap time is known for the driver
+        has_lap_time = results['DriverNumber'].isin(fastest_laps.keys())
+        position_idx = results['Position'].fillna(0).clip(0, _MAX_POSITION).astype(int).to_numpy()
+        fastest_lap_idx = (is_fastest_lap & ~has_lap_time).to_numpy(dtype=int)
+        results['AwardedPoints'] = _POINTS_TABLE[position_idx, fastest_lap_idx, int(is_sprint)]
+        
+        # Pit stops are counted from the lap data and left NULL when there is none
+        if pit_counts is None:
+            pit_stops = pd.Series([None] * len(results), index=results.index, dtype=object)
+        else:
+            pit_stops = results['DriverNumber'].map(pit_counts).fillna(0).astype(int)
+        
+        # Lap times are stored as integer microseconds with a separate fastest-lap flag;
+        # the text form is kept for the API, which still reads fastest_lap_time
+        lap_times = pd.to_timedelta(results['DriverNumber'].map(fastest_laps))
+        fastest_lap_time = (
+            lap_times.astype(str)
+            .where(has_lap_time, is_fastest_lap.map({True: "Fastest Lap", False: 'N/A'}))
+        )
+        
+        return pd.DataFrame({
+            'driver_name': results['FullName'],
+            'standardized_driver_name': results['StandardizedName'],
+            'team': results['TeamName'],
+            'points': results['AwardedPoints'],
+            'position': results['Position'],
+            'fastest_lap_time': fastest_lap_time,
+            'fastest_lap_us': lap_times // pd.Timedelta(microseconds=1),
+            'fastest_lap_flag': is_fastest_lap.astype(int),
+            'qualifying_position': results['QualiPos'],
+            'positions_gained': results['PositionsGained'],
+            'pit_stops': pit_stops,
+            'driver_number': results['DriverNumber'],
+            'driver_color': results['TeamColorHex'],
+            'nationality': results['Nationality'],
+            'fastest_lap': is_fastest_lap,
+        })
+        
+    except Exception as e:
+        logger.error(f"Error collecting results for round {round_num}: {str(e)}")
+        raise
+
+def _team_standings(drivers, is_sprint=False):
+    """Aggregate one session's driver results per team, ranked by points.
+    
+    Sprints only score points, so their wins, podiums and fastest laps are
+    not aggregated.
+    """
+    drivers = drivers.assign(team=drivers['team'].astype('category'))
+    aggregations = {'points': ('points', 'sum'), 'color': ('driver_color', 'first')}
+    if not is_sprint:
+        drivers = drivers.assign(win=drivers['position'].eq(1), podium=drivers['position'].le(3))
+        aggregations.update(wins=('win', 'sum'), podiums=('podium', 'sum'),
+                            fastest_laps=('fastest_lap', 'sum'))
+    standings = drivers.groupby('team', observed=True, sort=False).agg(**aggregations)
+    standings.index = standings.index.astype(object)
+    # Tied teams share the higher position
+    standings['position'] = standings['points'].rank(ascending=False, method='min').astype(int)
+    return standings
+
+def write_round(year, round_num, race_df, sprint_df, cursor):
+    """Write a round's race and sprint results with one upsert per driver and team.
+    
+    Either DataFrame may be None when that session is missing, in which case
+    existing rows keep their stored results for it.
+    """
+    try:
+        if race_df is None and sprint_df is None:
+            return
+        
+        if sprint_df is None:
+            driver_upsert, team_upsert = _SQL_UPSERT_DRIVER_RACE, _SQL_UPSERT_TEAM_RACE
+        elif race_df is None:
+            driver_upsert, team_upsert = _SQL_UPSERT_DRIVER_SPRINT, _SQL_UPSERT_TEAM_SPRINT
+        else:
+            driver_upsert, team_upsert = _SQL_UPSERT_DRIVER_ROUND, _SQL_UPSERT_TEAM_ROUND
         
-        # Batch insert driver data (only for new records)
-        if driver_data:
-            cursor.executemany("""
-                INSERT INTO driver_standings 
-                (year, round, driver_name, standardized_driver_name, team, points, total_points, position,
-                 fastest_lap_time, qualifying_position, positions_gained, pit_stops,
-                 driver_number, driver_color, nationality, is_sprint, sprint_points,
-                 sprint_position)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, driver_data)
+        # Drivers take their details from the race, falling back to the sprint
+        drivers = pd.concat([df for df in (race_df, sprint_df) if df is not None], ignore_index=True)
+        drivers = drivers.drop_duplicates('standardized_driver_name')
+        names = drivers['standardized_driver_name']
+        in_race = names.isin(race_df['standardized_driver_name'] if race_df is not None else [])
+        drivers['points'] = drivers['points'].where(in_race, 0)
+        drivers['position'] = drivers['position'].where(in_race, None)
+        if sprint_df is not None:
+            sprint = sprint_df.set_index('standardized_driver_name')
+            drivers['is_sprint'] = names.isin(sprint.index)
+            drivers['sprint_points'] = names.map(sprint['points']).fillna(0)
+            drivers['sprint_position'] = names.map(sprint['position'])
+        else:
+            drivers['is_sprint'] = False
+            drivers['sprint_points'] = 0
+            drivers['sprint_position'] = None
         
-        # Process team data
-        for team, data in team_data.items():
-            if is_sprint:
-                cursor.execute("""
-                    UPDATE constructors_standings
-                    SET sprint_points = ?,
-                        sprint_position = ?,
-                        is_sprint = 1
-                    WHERE year = ? AND round = ? AND team = ?
-                """, (data['points'], data['position'] if 'position' in data else None, year, round_num, team))
-            else:
-                cursor.execute("""
-                    UPDATE constructors_standings
-                    SET points = ?,
-                        position = ?,
-                        wins = wins + ?,
-                        podiums = podiums + ?,
-                        fastest_laps = fastest_laps + ?
-                    WHERE year = ? AND round = ? AND team = ?
-                """, (
-                    data['points'],
-                    data['position'] if 'position' in data else None,
-                    data['wins'],
-                    data['podiums'],
-                    data['fastest_laps'],
-                    year, round_num, team
-                ))
+        driver_data = [
+            (year, round_num, driver_name, standardized_name, team, points,
+             0,  # total_points will be updated later
+             position, fastest_lap_time, fastest_lap_us, fastest_lap_flag, quali_pos,
+             positions_gained, pit_stops, driver_number, driver_color, nationality,
+             is_sprint, sprint_points, sprint_position)
+            for (driver_name, standardized_name, team, points, position, fastest_lap_time,
+                 fastest_lap_us, fastest_lap_flag, quali_pos, positions_gained, pit_stops,
+                 driver_number, driver_color, nationality, is_sprint, sprint_points, sprint_position)
+            in drivers[['driver_name', 'standardized_driver_name', 'team', 'points', 'position',
+                        'fastest_lap_time', 'fastest_lap_us', 'fastest_lap_flag',
+                        'qualifying_position', 'positions_gained', 'pit_stops',
+                        'driver_number', 'driver_color', 'nationality', 'is_sprint',
+                        'sprint_points', 'sprint_position']].itertuples(index=False, name=None)
+        ]
+        insert_rows(cursor, _SQL_INSERT_DRIVER, driver_data, suffix=driver_upsert)
         
-        # Update total points
-        update_total_points(cursor, year)
+        # Teams are ranked separately for each session, then written together
+        race_teams = _team_standings(race_df) if race_df is not None else None
+        sprint_teams = _team_standings(sprint_df, is_sprint=True) if sprint_df is not None else None
+        teams = pd.concat([df for df in (race_teams, sprint_teams) if df is not None])
+        teams = teams[~teams.index.duplicated()].reindex(
+            columns=['points', 'wins', 'podiums', 'fastest_laps', 'color', 'position'])
+        in_race = teams.index.isin(race_teams.index if race_teams is not None else [])
+        teams['position'] = teams['position'].where(in_race, None)
+        for column in ('points', 'wins', 'podiums', 'fastest_laps'):
+            teams[column] = teams[column].where(in_race, 0)
+        if sprint_teams is not None:
+            teams['is_sprint'] = teams.index.isin(sprint_teams.index)
+            teams['sprint_points'] = teams.index.map(sprint_teams['points']).fillna(0)
+            teams['sprint_position'] = teams.index.map(sprint_teams['position'])
+        else:
+            teams['is_sprint'] = False
+            teams['sprint_points'] = 0
+            teams['sprint_position'] = None
+        
+        team_data = [
+            (year, round_num, team, float(points), 0, position, int(wins), int(podiums),
+             int(fastest_laps), color, is_sprint, float(sprint_points), sprint_position)
+            for team, points, position, wins, podiums, fastest_laps, color, is_sprint,
+                sprint_points, sprint_position
+            in teams[['points', 'position', 'wins', 'podiums', 'fastest_laps', 'color',
+                      'is_sprint', 'sprint_points', 'sprint_position']].itertuples(name=None)
+        ]
+        insert_rows(cursor, _SQL_INSERT_TEAM, team_data, suffix=team_upsert)
         
     except Exception as e:
-        logger.error(f"Error processing race data for round {round_num}: {str(e)}")
+        logger.error(f"Error writing results for round {round_num}: {str(e)}")
         raise
 
 def update_total_points(cursor, year=2025):
-    """Update total points for drivers and teams efficiently."""
+    """Update total points for drivers and teams efficiently.
+    
+    Running totals are computed in one pandas pass per table and written
+    back with executemany, instead of a correlated subquery per row.
+    """
     try:
         # Update driver total points
         cursor.execute("""
-            UPDATE driver_standings
-            SET total_points = (
-                SELECT SUM(points + sprint_points)
-                FROM driver_standings ds2
-                WHERE ds2.year = driver_standings.year
-                AND ds2.driver_name = driver_standings.driver_name
-                AND ds2.round <= driver_standings.round
-            )
+            SELECT round, standardized_driver_name, COALESCE(points, 0) + COALESCE(sprint_points, 0)
+            FROM driver_standings
             WHERE year = ?
+            ORDER BY standardized_driver_name, round
         """, (year,))
+        drivers = pd.DataFrame(cursor.fetchall(), columns=['round', 'driver_name', 'points'])
+        drivers['total_points'] = drivers['points'].astype(float).groupby(drivers['driver_name']).cumsum()
+        cursor.executemany("""
+            UPDATE driver_standings
+            SET total_points = ?
+            WHERE year = ? AND round = ? AND standardized_driver_name = ?
+        """, [
+            (total_points, year, round_num, driver_name)
+            for round_num, driver_name, total_points
+            in drivers[['round', 'driver_name', 'total_points']].itertuples(index=False, name=None)
+        ])
         
         # Update team total points
         cursor.execute("""
-            UPDATE constructors_standings
-            SET total_points = (
-                SELECT SUM(points + sprint_points)
-                FROM constructors_standings cs2
-                WHERE cs2.year = constructors_standings.year
-                AND cs2.team = constructors_standings.team
-                AND cs2.round <= constructors_standings.round
-            )
+            SELECT round, team, COALESCE(points, 0) + COALESCE(sprint_points, 0)
+            FROM constructors_standings
             WHERE year = ?
+            ORDER BY team, round
         """, (year,))
+        teams = pd.DataFrame(cursor.fetchall(), columns=['round', 'team', 'points'])
+        teams['total_points'] = teams['points'].astype(float).groupby(teams['team']).cumsum()
+        cursor.executemany("""
+            UPDATE constructors_standings
+            SET total_points = ?
+            WHERE year = ? AND round = ? AND team = ?
+        """, [
+            (total_points, year, round_num, team)
+            for round_num, team, total_points
+            in teams[['round', 'team', 'total_points']].itertuples(index=False, name=None)
+        ])
         
-        logger.info("Successfully updated total points")
+        logger.debug("Successfully updated total points")
         
     except Exception as e:
         logger.error(f"Error updating total points: {str(e)}")
         raise
 
-def populate_2025_data():
-    """Populate race data for the 2025 season."""
+def fetch_round(round_num, has_sprint=False, settled_at=None, refresh=False):
+    """Load the sprint (if any) and main race sessions and the qualifying positions for a round.
+    
+    settled_at and refresh are passed on to load_session_data.
+    """
+    sprint_session = None
+    if has_sprint:
+        sprint_session = load_session_data(2025, round_num, 'S', settled_at=settled_at, refresh=refresh)
+    race_session = load_session_data(2025, round_num, 'R', settled_at=settled_at, refresh=refresh)
+    quali_positions = get_qualifying_positions(2025, round_num)
+    return sprint_session, race_session, quali_positions
+
+def populate_2025_data(force=False):
+    """Populate race data for the 2025 season.
+    
+    Rounds whose settled results are already stored are skipped unless force
+    is set, in which case they are fetched again without the parsed cache,
+    e.g. to pick up results changed by a later penalty.
+    """
     try:
         with get_db_connection() as conn:
+            # Manage transactions explicitly instead of sqlite3's implicit BEGIN
+            conn.isolation_level = None
+            tune_connection(conn)
             cursor = conn.cursor()
             
-            # Get sprint races
+            # Reuse this connection for the schema check and table setup;
+            # indexes are created once the data has been loaded
+            if needs_rebuild(conn):
+                init_tables(conn)
+                conn.commit()
+            
+            # Only rounds that have already taken place are fetched
             cursor.execute("""
-                SELECT round, name 
+                SELECT round, name, is_sprint, date
                 FROM race_schedule 
-                WHERE year = 2025 AND is_sprint = 1
+                WHERE year = 2025 AND date <= ?
                 ORDER BY round
-            """)
-            sprint_races = {row[0]: row[1] for row in cursor.fetchall()}
+            """, (datetime.now().strftime('%Y-%m-%d'),))
+            completed_rounds = cursor.fetchall()
+            
+            # Fall back to the FastF1 calendar when the schedule table is empty
+            if not completed_rounds:
+                schedule = fastf1.get_event_schedule(2025, include_testing=False)
+                event_dates = pd.to_datetime(schedule['EventDate'])
+                past = schedule[event_dates.notna() & (event_dates <= pd.Timestamp.now())]
+                completed_rounds = [
+                    (int(round_num), name, event_format in ('sprint', 'sprint_qualifying'),
+                     event_date.strftime('%Y-%m-%d'))
+                    for round_num, name, event_format, event_date
+                    in past[['RoundNumber', 'EventName', 'EventFormat']].assign(EventDay=event_dates)
+                    .itertuples(index=False, name=None)
+                ]
+            
+            # Skip rounds whose final results are already stored; a round is only
+            # marked once its results have settled
+            if not force:
+                cursor.execute("SELECT round FROM ingested_rounds WHERE year = 2025 AND session = 'R'")
+                ingested = {round_num for (round_num,) in cursor.fetchall()}
+                completed_rounds = [row for row in completed_rounds if row[0] not in ingested]
+            settled_at = {
+                round_num: datetime.fromisoformat(date) + timedelta(days=RESULTS_SETTLED_DAYS)
+                for round_num, _, _, date in completed_rounds
+            }
+            
+            # Get sprint races
+            sprint_races = {round_num: name for round_num, name, is_sprint, _ in completed_rounds if is_sprint}
+            
+            # Write the whole season, including the index rebuild, in a single
+            # transaction so a failed run leaves the previous data and indexes intact
+            cursor.execute("BEGIN IMMEDIATE")
             
-            # Process each round
-            for round_num in range(1, 24):  # 23 races in 2025
-                try:
-                    # Check if this round has a sprint race
-                    if round_num in sprint_races:
-                        logger.info(f"Processing sprint race for Round {round_num} ({sprint_races[round_num]})")
+            try:
+                # Indexes left from a previous run are rebuilt after the load
+                drop_indexes(cursor)
+                
+                # Fetch sessions concurrently, write to the database on this thread;
+                # progress is reported on one bar instead of log lines per round
+                round_names = {round_num: name for round_num, name, _, _ in completed_rounds}
+                with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor, \
+                        tqdm(total=len(completed_rounds), desc='rounds') as pbar:
+                    futures = {
+                        executor.submit(fetch_round, round_num, round_num in sprint_races,
+                                        settled_at[round_num], force): round_num
+                        for round_num, _, _, _ in completed_rounds
+                    }
+                    
+                    for future in as_completed(futures):
+                        round_num = futures[future]
+                        pbar.set_postfix_str(round_names[round_num])
+                        # Undo partial writes of a failed round without losing the others
+                        cursor.execute("SAVEPOINT round_data")
                         try:
-                            # Load sprint session
-                            sprint_session = fastf1.get_session(2025, round_num, 'S')
-                            sprint_session.load()
-                            # Process sprint data
-                            process_race_data(sprint_session, round_num, cursor, year=2025, is_sprint=True)
+                            sprint_session, race_session, quali_positions = future.result()
+                            
+                            # Collect the sprint first if this round has one
+                            sprint_df = None
+                            if sprint_session is not None:
+                                logger.debug("Processing sprint race for Round %s (%s)", round_num, sprint_races[round_num])
+                                try:
+                                    sprint_df = collect_results(sprint_session, round_num, year=2025, is_sprint=True,
+                                                                quali_positions=quali_positions)
+                                except Exception as e:
+                                    logger.error(f"Error processing sprint data for Round {round_num}: {str(e)}")
+                            
+                            # Collect main race
+                            race_df = None
+                            if race_session is None:
+                                logger.warning(f"No race session found for Round {round_num}")
+                            else:
+                                logger.debug("Processing main race for Round %s", round_num)
+                                race_df = collect_results(race_session, round_num, year=2025, is_sprint=False,
+                                                          quali_positions=quali_positions)
+                            
+                            # Write both sessions with a single upsert per driver and team
+                            write_round(2025, round_num, race_df, sprint_df, cursor)
+                            
+                            # Remember settled rounds so later runs don't fetch them again
+                            if race_df is not None and datetime.now() >= settled_at[round_num]:
+                                loaded_at = datetime.now().isoformat(timespec='seconds')
+                                cursor.executemany(
+                                    "INSERT OR REPLACE INTO ingested_rounds (year, round, session, loaded_at) VALUES (?, ?, ?, ?)",
+                                    [(2025, round_num, session, loaded_at)
+                                     for session, df in (('R', race_df), ('S', sprint_df)) if df is not None]
+                                )
+                            
+                        except sqlite3.Error:
+                            # A database error isn't specific to this round, so fail the
+                            # run instead of skipping every round the same way
+                            cursor.execute("ROLLBACK TO round_data")
+                            for pending in futures:
+                                pending.cancel()
+                            raise
                         except Exception as e:
-                            logger.error(f"Error processing sprint data for Round {round_num}: {str(e)}")
-                    
-                    # Process main race
-                    logger.info(f"Processing main race for Round {round_num}")
-                    race_session = fastf1.get_session(2025, round_num, 'R')
-                    race_session.load()
-                    process_race_data(race_session, round_num, cursor, year=2025, is_sprint=False)
-                    
-                    # Commit after each round is processed
-                    conn.commit()
-                    
-                except Exception as e:
-                    logger.error(f"Error processing Round {round_num}: {str(e)}")
-                    continue
+                            logger.error(f"Error processing Round {round_num}: {str(e)}")
+                            cursor.execute("ROLLBACK TO round_data")
+                        finally:
+                            cursor.execute("RELEASE round_data")
+                            pbar.update()
+                
+                # Total points are cumulative, so compute them once for the season
+                update_total_points(cursor, 2025)
+                
+                create_indexes(cursor)
+                
+                # Refresh planner statistics for the freshly loaded tables and indexes
+                cursor.execute("ANALYZE")
+                
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
             
-            # Final update of total points
-            update_total_points(cursor, 2025)
-            conn.commit()
+            # Fold the WAL back into the database file for later readers
+            cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
             
             logger.info("Successfully populated 2025 data")
             
@@ -559,4 +965,8 @@ def populate_2025_data():
         raise
 
 if __name__ == '__main__':
-    populate_2025_data() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Populate F1 data for the 2025 season')
+    parser.add_argument('--force', action='store_true',
+                        help='Reload rounds whose results are already in the database')
+    args = parser.parse_args()
+    populate_2025_data(force=args.force)
@@ -2,13 +2,17 @@ import fastf1
 import pandas as pd
 import sqlite3
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 import time
-import hashlib
+import zlib
+import pickle
 import numpy as np
 import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import sys
+from schema_migration import schema_layout, migration_needed, migrate_tables
 
 # Configure logging
 logging.basicConfig(
@@ -22,12 +26,43 @@ cache_dir = os.path.join(os.path.dirname(__file__), 'cache')
 os.makedirs(cache_dir, exist_ok=True)
 fastf1.Cache.enable_cache(cache_dir)
 
+# Sessions older than this are served from the FastF1 cache without
+# revalidating it over the network; their data no longer changes
+OFFLINE_AFTER_DAYS = 7
+
+# Number of races loaded in parallel worker processes
+LOAD_WORKERS = 4
+
 # Database configuration
 DB_PATH = os.getenv('DB_PATH', '/app/data/f1_data.db')
 
-def get_schema_hash():
-    """Calculate a hash of the current database schema."""
-    schema = """
+# Driver name spellings mapped to the name stored in the database
+_NAME_MAP = {
+    'Andrea Kimi Antonelli': 'Kimi Antonelli',
+    'Kimi Antonelli': 'Kimi Antonelli',
+    'Isack Hadjar': 'Isack Hadjar',
+    'Gabriel Bortoleto': 'Gabriel Bortoleto',
+    'Jack Doohan': 'Jack Doohan',
+    'Liam Lawson': 'Liam Lawson',
+    'Yuki Tsunoda': 'Yuki Tsunoda',
+    'Pierre Gasly': 'Pierre Gasly',
+    'Fernando Alonso': 'Fernando Alonso',
+    'Carlos Sainz': 'Carlos Sainz',
+    'Lewis Hamilton': 'Lewis Hamilton',
+    'Charles Leclerc': 'Charles Leclerc',
+    'Lance Stroll': 'Lance Stroll',
+    'Esteban Ocon': 'Esteban Ocon',
+    'Oliver Bearman': 'Oliver Bearman',
+    'Nico Hulkenberg': 'Nico Hulkenberg',
+    'Alexander Albon': 'Alexander Albon',
+    'George Russell': 'George Russell',
+    'Oscar Piastri': 'Oscar Piastri',
+    'Lando Norris': 'Lando Norris',
+    'Max Verstappen': 'Max Verstappen'
+}
+
+# Database schema, fingerprinted by get_schema_hash
+_SCHEMA_SQL = """
     CREATE TABLE IF NOT EXISTS race_schedule (
         year INTEGER,
         round INTEGER,
@@ -56,6 +91,7 @@ def get_schema_hash():
         year INTEGER,
         round INTEGER,
         driver_name TEXT,
+        standardized_driver_name TEXT,
         team TEXT,
         points INTEGER,
         position INTEGER,
@@ -66,7 +102,7 @@ def get_schema_hash():
         driver_number INTEGER,
         driver_color TEXT,
         nationality TEXT,
-        PRIMARY KEY (year, round, driver_name)
+        PRIMARY KEY (year, round, standardized_driver_name)
     );
 
     CREATE TABLE IF NOT EXISTS constructors_standings (
@@ -82,92 +118,118 @@ def get_schema_hash():
         PRIMARY KEY (year, round, team)
     );
     """
-    return hashlib.md5(schema.encode()).hexdigest()
+
+_TABLES_DDL = _SCHEMA_SQL + """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version TEXT PRIMARY KEY
+    );
+    """
+
+# Statements are kept as constants so every race reuses the same SQL text and
+# therefore the connection's prepared-statement cache
+_SQL_UPSERT_SCHEDULE = """
+    INSERT INTO race_schedule 
+    (year, round, name, date, event, country)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(year, round) DO UPDATE SET
+        name = excluded.name,
+        date = excluded.date,
+        event = excluded.event,
+        country = excluded.country
+"""
+
+# Multi-row upserts used by insert_rows; the VALUES list is appended per chunk
+_SQL_INSERT_DRIVER = """
+    INSERT INTO driver_standings 
+    (year, round, driver_name, standardized_driver_name, team, points, position, 
+     fastest_lap_time, qualifying_position, positions_gained, 
+     pit_stops, driver_number, driver_color, nationality)
+    VALUES """
+_SQL_UPSERT_DRIVER = """
+    ON CONFLICT(year, round, standardized_driver_name) DO UPDATE SET
+        driver_name = excluded.driver_name,
+        team = excluded.team,
+        points = excluded.points,
+        position = excluded.position,
+        fastest_lap_time = excluded.fastest_lap_time,
+        qualifying_position = excluded.qualifying_position,
+        positions_gained = excluded.positions_gained,
+        pit_stops = excluded.pit_stops,
+        driver_number = excluded.driver_number,
+        driver_color = excluded.driver_color,
+        nationality = excluded.nationality
+"""
+_SQL_INSERT_DRIVER_RAW = """
+    INSERT INTO driver_standings_raw 
+    (year, round, driver_name, standardized_driver_name, team, points, position, 
+     fastest_lap_time, qualifying_position, positions_gained, 
+     pit_stops, driver_number, driver_color, nationality)
+    VALUES """
+_SQL_INSERT_TEAM = """
+    INSERT INTO constructors_standings 
+    (year, round, team, points, position, wins, podiums, 
+     fastest_laps, team_color)
+    VALUES """
+_SQL_UPSERT_TEAM = """
+    ON CONFLICT(year, round, team) DO UPDATE SET
+        points = excluded.points,
+        position = excluded.position,
+        wins = excluded.wins,
+        podiums = excluded.podiums,
+        fastest_laps = excluded.fastest_laps,
+        team_color = excluded.team_color
+"""
+
+# Expected layout of every table, compared against existing databases by init_db
+_SCHEMA_LAYOUT = schema_layout(_SCHEMA_SQL)
+
+# Rows per multi-row INSERT, kept well below SQLite's bound-parameter limit
+_INSERT_CHUNK_SIZE = 500
+
+# Schema fingerprint, computed once at import
+_SCHEMA_HASH = format(zlib.crc32(_SCHEMA_SQL.encode()), '08x')
+
+def get_schema_hash():
+    """Return the hash of the current database schema."""
+    return _SCHEMA_HASH
+
+def _schema_current(conn):
+    """Check whether the current schema version is recorded and the tables match it."""
+    try:
+        row = conn.execute(
+            "SELECT 1 FROM schema_version WHERE version = ? LIMIT 1", (get_schema_hash(),)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        # schema_version doesn't exist yet
+        return False
+    # The version alone isn't enough; tables from an older layout may have been kept
+    return row is not None and not migration_needed(conn, _SCHEMA_LAYOUT)
 
 def init_db():
-    """Initialize the database with required tables."""
+    """Initialize the database with required tables.
+    
+    Tables left from an older schema, or created by the other loaders, are
+    migrated before the schema version is recorded. Does nothing when the
+    database already has the current schema.
+    """
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
     try:
+        if _schema_current(conn):
+            logger.debug("Database schema is up to date")
+            return
+        
         # Enable WAL mode for better concurrency
         cursor.execute("PRAGMA journal_mode=WAL")
         
-        # Create race_schedule table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS race_schedule (
-                year INTEGER,
-                round INTEGER,
-                name TEXT,
-                date TEXT,
-                event TEXT,
-                country TEXT,
-                PRIMARY KEY (year, round)
-            )
-        """)
-        
-        # Create circuits table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS circuits (
-                year INTEGER,
-                round INTEGER,
-                circuit_name TEXT,
-                location TEXT,
-                country TEXT,
-                circuit_length REAL,
-                number_of_laps INTEGER,
-                first_grand_prix INTEGER,
-                lap_record TEXT,
-                track_map TEXT,
-                PRIMARY KEY (year, round)
-            )
-        """)
-        
-        # Create driver_standings table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS driver_standings (
-                year INTEGER,
-                round INTEGER,
-                driver_name TEXT,
-                team TEXT,
-                points INTEGER,
-                position INTEGER,
-                fastest_lap_time TEXT,
-                qualifying_position INTEGER,
-                positions_gained INTEGER,
-                pit_stops INTEGER,
-                driver_number INTEGER,
-                driver_color TEXT,
-                nationality TEXT,
-                PRIMARY KEY (year, round, driver_name)
-            )
-        """)
-
-        # Create constructors_standings table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS constructors_standings (
-                year INTEGER,
-                round INTEGER,
-                team TEXT,
-                points INTEGER,
-                position INTEGER,
-                wins INTEGER,
-                podiums INTEGER,
-                fastest_laps INTEGER,
-                team_color TEXT,
-                PRIMARY KEY (year, round, team)
-            )
-        """)
-        
-        # Create schema_version table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS schema_version (
-                version TEXT PRIMARY KEY
-            )
-        """)
+        # Create missing tables with one script inside a single transaction, and
+        # migrate existing ones in the same transaction
+        cursor.executescript("BEGIN;" + _TABLES_DDL)
+        migrate_tables(cursor, _SCHEMA_LAYOUT)
         
-        # Store current schema version
-        cursor.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (?)", (get_schema_hash(),))
+        # Store current schema version; nothing is written when it is already recorded
+        cursor.execute("INSERT OR IGNORE INTO schema_version (version) VALUES (?)", (get_schema_hash(),))
         
         conn.commit()
         logger.info("Database initialized successfully")
@@ -183,10 +245,180 @@ def get_db_connection():
     """Get a database connection with proper configuration."""
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
+    
+    # Bulk-load friendly settings; a backfill can simply be rerun, so
+    # syncing only at WAL checkpoints is durable enough
+    try:
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-131072")  # 128 MiB
+        conn.execute("PRAGMA wal_autocheckpoint=10000")
+    except sqlite3.DatabaseError as e:
+        logger.warning(f"Could not apply connection PRAGMAs: {str(e)}")
     return conn
 
-def populate_historical_data(year):
-    """Populate race data for the specified year."""
+def insert_rows(cursor, insert_sql, rows, suffix='', chunksize=_INSERT_CHUNK_SIZE):
+    """Insert rows with one multi-row VALUES statement per chunk.
+    
+    suffix is appended after the VALUES list, e.g. an ON CONFLICT clause.
+    """
+    if not rows:
+        return
+    placeholders = "(" + ", ".join("?" * len(rows[0])) + ")"
+    for start in range(0, len(rows), chunksize):
+        chunk = rows[start:start + chunksize]
+        cursor.execute(insert_sql + ", ".join([placeholders] * len(chunk)) + suffix,
+                       [value for row in chunk for value in row])
+
+def load_event_schedule(year):
+    """Get the columns of a season's schedule used here.
+    
+    Finished seasons no longer change, so their schedule is kept on disk
+    and read back instead of being fetched and parsed by FastF1 again.
+    """
+    schedule_path = os.path.join(cache_dir, f"schedule_{year}.pkl")
+    season_over = year < datetime.now().year
+    if season_over and os.path.exists(schedule_path):
+        try:
+            with open(schedule_path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cached schedule for {year}: {str(e)}")
+    
+    schedule = pd.DataFrame(
+        fastf1.get_event_schedule(year)[['RoundNumber', 'EventName', 'EventDate', 'EventFormat', 'Country']]
+    )
+    
+    if season_over:
+        tmp_path = f"{schedule_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(schedule, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, schedule_path)
+    
+    return schedule
+
+def load_race_session(year, round_num, event_date):
+    """Load a race session, reading completed events from the cache only.
+    
+    Falls back to a normal online load when the cached copy is missing
+    or incomplete.
+    """
+    if datetime.now() - event_date > timedelta(days=OFFLINE_AFTER_DAYS):
+        session = fastf1.get_session(year, round_num, 'R')
+        fastf1.Cache.offline_mode(True)
+        try:
+            session.load(weather=False, messages=False, laps=True)
+            if len(session.results) and len(session.laps):
+                return session
+        except Exception as e:
+            logger.debug("No usable cached data for %s Round %s: %s", year, round_num, e)
+        finally:
+            fastf1.Cache.offline_mode(False)
+    
+    session = fastf1.get_session(year, round_num, 'R')
+    session.load(weather=False, messages=False, laps=True)
+    return session
+
+def process_round(year, round_num, event_name, event_date, event_format, country):
+    """Load one race and build its rows for race_schedule, driver_standings
+    and constructors_standings.
+    
+    Runs in a worker process, so it does not touch the database.
+    """
+    logger.info(f"Processing {year} Round {round_num}: {event_name}")
+    
+    # Load race session
+    session = load_race_session(year, round_num, event_date)
+    
+    # Get race info
+    schedule_row = (year, round_num, event_name, event_date.strftime('%Y-%m-%d'), event_format, country)
+    
+    # Get results, with team colors normalized to '#RRGGBB' once for all rows
+    colors = session.results['TeamColor'].fillna('').astype(str)
+    results = session.results.assign(
+        TeamColorHex=colors.where(colors.str.startswith('#'), '#' + colors).where(colors.ne(''), '#ff0000')
+    )
+    
+    # Get fastest laps for each driver with one groupby over all laps
+    fastest_laps = {}
+    try:
+        fastest_by_driver = session.laps.groupby('DriverNumber')['LapTime'].min().dropna()
+        fastest_laps = {driver: str(lap_time) for driver, lap_time in fastest_by_driver.items()}
+    except Exception as e:
+        logger.warning(f"Error getting fastest laps for {year} Round {round_num}: {str(e)}")
+        # If we can't get fastest laps, we'll use a fallback approach
+        try:
+            # Try to get fastest lap from results; drivers who had it get a placeholder
+            if 'FastestLap' in results:
+                fastest_laps = dict.fromkeys(results.loc[results['FastestLap'].eq(True), 'DriverNumber'], "Fastest Lap")
+        except Exception as e2:
+            logger.warning(f"Error with fallback fastest lap approach: {str(e2)}")
+    
+    # Driver standings, built from the results columns directly
+    # instead of looking each driver up with session.get_driver
+    grid_position = results['GridPosition'] if 'GridPosition' in results else results['Position']
+    
+    # Get fastest lap time with fallback
+    fastest_lap_time = results['DriverNumber'].map(fastest_laps).fillna('')
+    if 'FastestLap' in results:
+        fastest_lap_time = fastest_lap_time.mask(
+            fastest_lap_time.eq('') & results['FastestLap'].fillna(False).astype(bool), "Fastest Lap"
+        )
+    
+    driver_rows = list(pd.DataFrame({
+        'year': year,
+        'round': round_num,
+        'driver_name': results['FullName'],
+        'standardized_driver_name': results['FullName'].map(_NAME_MAP).fillna(results['FullName']),
+        'team': results['TeamName'],
+        'points': results['Points'],
+        'position': results['Position'],
+        'fastest_lap_time': fastest_lap_time,
+        'qualifying_position': grid_position,
+        'positions_gained': grid_position - results['Position'],
+        'pit_stops': results['NumberOfPitStops'] if 'NumberOfPitStops' in results else 0,
+        'driver_number': results['DriverNumber'],
+        'driver_color': results['TeamColorHex'],
+        'nationality': results['Nationality'] if 'Nationality' in results else 'Unknown'
+    }).itertuples(index=False, name=None))
+    
+    # Constructor standings, aggregated for all teams in one groupby
+    team_standings = pd.DataFrame({
+        'team': results['TeamName'],
+        'points': results['Points'],
+        'win': results['Position'].eq(1),
+        'podium': results['Position'].isin([1, 2, 3]),
+        'fastest_lap': results['FastestLap'].eq(True) if 'FastestLap' in results else False,
+        'color': results['TeamColorHex']
+    }).groupby('team', sort=False).agg(
+        points=('points', 'sum'), wins=('win', 'sum'), podiums=('podium', 'sum'),
+        fastest_laps=('fastest_lap', 'sum'), color=('color', 'first')
+    )
+    if 'FastestLap' not in results:
+        logger.warning(f"No fastest lap data for {year} Round {round_num}")
+        # If we can't count fastest laps, use a reasonable default
+        team_standings['fastest_laps'] = team_standings['points'].gt(0).astype(int)
+    team_standings['position'] = team_standings['points'].rank(ascending=False, method='min').astype(int)
+    
+    team_rows = [
+        (year, round_num, team, points, position, wins, podiums, fastest_laps, color)
+        for team, points, position, wins, podiums, fastest_laps, color
+        in team_standings[['points', 'position', 'wins', 'podiums', 'fastest_laps', 'color']]
+        .itertuples(name=None)
+    ]
+    
+    return schedule_row, driver_rows, team_rows
+
+def populate_historical_data(year, bulk=False, force=False):
+    """Populate race data for the specified year.
+    
+    Races that already have driver standings are skipped unless force is set.
+    
+    With bulk, driver rows are staged in a temporary table without a
+    primary key and moved into driver_standings with one sorted
+    INSERT ... SELECT at the end, so its key index is built in one pass.
+    """
     try:
         # Initialize database
         init_db()
@@ -194,149 +426,75 @@ def populate_historical_data(year):
         logger.info(f"Processing year {year}")
         
         # Get race schedule
-        schedule = fastf1.get_event_schedule(year)
+        schedule = load_event_schedule(year)
         
-        for _, race in schedule.iterrows():
-            round_num = race['RoundNumber']
-            logger.info(f"Processing {year} Round {round_num}: {race['EventName']}")
+        # One connection for the whole season
+        conn = get_db_connection()
+        try:
+            if bulk:
+                conn.execute("CREATE TEMP TABLE driver_standings_raw AS SELECT * FROM driver_standings WHERE 0")
+            driver_insert, driver_upsert = (_SQL_INSERT_DRIVER_RAW, '') if bulk else (_SQL_INSERT_DRIVER, _SQL_UPSERT_DRIVER)
             
-            try:
-                # Load race session
-                session = fastf1.get_session(year, round_num, 'R')
-                session.load(weather=False, messages=False, laps=True)
-                
-                # Get race info
-                race_info = {
-                    'year': year,
-                    'round': round_num,
-                    'name': race['EventName'],
-                    'date': race['EventDate'].strftime('%Y-%m-%d'),
-                    'event': race['EventFormat'],
-                    'country': race['Country']
+            # Don't load races that an earlier run already stored
+            if not force:
+                done = {round_num for (round_num,) in conn.execute(
+                    "SELECT DISTINCT round FROM driver_standings WHERE year = ?", (year,)
+                )}
+                if done:
+                    logger.info(f"Skipping {len(done)} already populated rounds for {year}")
+                    schedule = schedule[~schedule['RoundNumber'].isin(done)]
+            
+            # Load races in worker processes; rows are written here on one connection.
+            # Workers are spawned rather than forked: this process already has FastF1's
+            # SQLite request cache open, and an SQLite handle must not cross a fork.
+            # Each spawned worker sets up its own cache when it imports this module.
+            with ProcessPoolExecutor(max_workers=LOAD_WORKERS,
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = {
+                    executor.submit(process_round, year, *race): race[0]
+                    for race in schedule[['RoundNumber', 'EventName', 'EventDate', 'EventFormat', 'Country']]
+                    .itertuples(index=False, name=None)
                 }
                 
-                # Store race schedule
-                with get_db_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO race_schedule 
-                        (year, round, name, date, event, country)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    """, (
-                        race_info['year'], race_info['round'],
-                        race_info['name'], race_info['date'],
-                        race_info['event'], race_info['country']
-                    ))
-                    conn.commit()
-                
-                # Get results
-                results = session.results
-                
-                # Get fastest laps for each driver
-                fastest_laps = {}
-                try:
-                    for driver in session.drivers:
-                        driver_laps = session.laps.pick_drivers(driver)
-                        fastest_lap = driver_laps['LapTime'].min()
-                        if pd.notnull(fastest_lap):
-                            fastest_laps[driver] = str(fastest_lap)
-                except Exception as e:
-                    logger.warning(f"Error getting fastest laps for {year} Round {round_num}: {str(e)}")
-                    # If we can't get fastest laps, we'll use a fallback approach
+                for future in as_completed(futures):
+                    round_num = futures[future]
                     try:
-                        # Try to get fastest lap from results
-                        for _, result in results.iterrows():
-                            driver = result['DriverNumber']
-                            if 'FastestLap' in result and result['FastestLap']:
-                                # If this driver had the fastest lap, use a placeholder
-                                fastest_laps[driver] = "Fastest Lap"
-                    except Exception as e2:
-                        logger.warning(f"Error with fallback fastest lap approach: {str(e2)}")
-                
-                # Store driver standings
-                with get_db_connection() as conn:
-                    cursor = conn.cursor()
-                    for _, result in results.iterrows():
-                        driver = result['DriverNumber']
-                        driver_info = session.get_driver(driver)
+                        schedule_row, driver_rows, team_rows = future.result()
                         
-                        # Get team color
-                        team_color = driver_info.get('TeamColor', '#ff0000')
-                        if team_color and not team_color.startswith('#'):
-                            team_color = f'#{team_color}'
+                        # Write the whole race in one transaction
+                        with conn:
+                            # Store race schedule
+                            conn.execute(_SQL_UPSERT_SCHEDULE, schedule_row)
+                            
+                            # Store driver and constructor standings with one statement each
+                            insert_rows(conn, driver_insert, driver_rows, suffix=driver_upsert)
+                            insert_rows(conn, _SQL_INSERT_TEAM, team_rows, suffix=_SQL_UPSERT_TEAM)
                         
-                        # Get grid position
-                        grid_position = driver_info.get('GridPosition', result['Position'])
+                        logger.info(f"Successfully processed {year} Round {round_num}")
                         
-                        # Calculate positions gained
-                        positions_gained = grid_position - result['Position']
-                        
-                        # Get fastest lap time with fallback
-                        fastest_lap_time = fastest_laps.get(driver, '')
-                        if not fastest_lap_time and 'FastestLap' in result and result['FastestLap']:
-                            fastest_lap_time = "Fastest Lap"
-                        
-                        cursor.execute("""
-                            INSERT OR REPLACE INTO driver_standings 
-                            (year, round, driver_name, team, points, position, 
-                             fastest_lap_time, qualifying_position, positions_gained, 
-                             pit_stops, driver_number, driver_color, nationality)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            year, round_num,
-                            driver_info['FullName'],
-                            driver_info['TeamName'],
-                            result['Points'],
-                            result['Position'],
-                            fastest_lap_time,
-                            grid_position,
-                            positions_gained,
-                            result.get('NumberOfPitStops', 0),
-                            driver,
-                            team_color,
-                            driver_info.get('Nationality', 'Unknown')
-                        ))
-                    conn.commit()
-                
-                # Store constructor standings
-                with get_db_connection() as conn:
-                    cursor = conn.cursor()
-                    for team in session.results['TeamName'].unique():
-                        team_results = session.results[session.results['TeamName'] == team]
-                        team_points = team_results['Points'].sum()
-                        team_position = len(team_results[team_results['Points'] > team_points]) + 1
-                        
-                        # Count fastest laps with fallback
-                        fastest_laps_count = 0
-                        try:
-                            fastest_laps_count = len(team_results[team_results['FastestLap'] == True])
-                        except Exception as e:
-                            logger.warning(f"Error counting fastest laps for team {team}: {str(e)}")
-                            # If we can't count fastest laps, use a reasonable default
-                            fastest_laps_count = 1 if team_points > 0 else 0
-                        
-                        cursor.execute("""
-                            INSERT OR REPLACE INTO constructors_standings 
-                            (year, round, team, points, position, wins, podiums, 
-                             fastest_laps, team_color)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            year, round_num,
-                            team,
-                            team_points,
-                            team_position,
-                            len(team_results[team_results['Position'] == 1]),
-                            len(team_results[team_results['Position'].isin([1, 2, 3])]),
-                            fastest_laps_count,
-                            team_results.iloc[0].get('TeamColor', '#ff0000')
-                        ))
-                    conn.commit()
-                
-                logger.info(f"Successfully processed {year} Round {round_num}")
-                
-            except Exception as e:
-                logger.error(f"Error processing {year} Round {round_num}: {str(e)}")
-                continue
+                    except sqlite3.Error:
+                        # Every race is written the same way, so a database error
+                        # fails the season instead of being logged once per race;
+                        # races not yet started are dropped rather than downloaded
+                        for pending in futures:
+                            pending.cancel()
+                        raise
+                    except Exception as e:
+                        logger.error(f"Error processing {year} Round {round_num}: {str(e)}")
+                        continue
+            
+            if bulk:
+                # Move the staged drivers over in key order, then drop the staging table
+                with conn:
+                    conn.execute(f"""
+                        INSERT INTO driver_standings
+                        SELECT * FROM driver_standings_raw WHERE true
+                        ORDER BY year, round, standardized_driver_name
+                        {_SQL_UPSERT_DRIVER}
+                    """)
+                conn.execute("DROP TABLE driver_standings_raw")
+        finally:
+            conn.close()
         
         logger.info(f"Successfully completed processing for year {year}")
         
@@ -347,6 +505,10 @@ def populate_historical_data(year):
 def main():
     parser = argparse.ArgumentParser(description='Populate F1 historical data for a specific year')
     parser.add_argument('year', type=int, help='Year to populate (2020-2025)')
+    parser.add_argument('--bulk', action='store_true',
+                        help='Stage driver rows without a key index and load them in one pass at the end')
+    parser.add_argument('--force', action='store_true',
+                        help='Reload races that are already in the database')
     args = parser.parse_args()
 
     # Validate year
@@ -355,7 +517,7 @@ def main():
         sys.exit(1)
 
     try:
-        populate_historical_data(args.year)
+        populate_historical_data(args.year, bulk=args.bulk, force=args.force)
         logger.info("Data population completed successfully")
     except Exception as e:
         logger.error(f"Failed to populate data: {str(e)}")
@@ -0,0 +1,70 @@
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Columns filled from another column when a table is copied from an older schema
+COLUMN_FALLBACKS = {'standardized_driver_name': 'driver_name'}
+
+def table_layout(conn, table):
+    """Return a table's columns as {name: (type, default)} and its primary key columns."""
+    info = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    columns = {name: (col_type, default) for _, name, col_type, _, default, _ in info}
+    primary_key = [name for _, name, _, _, _, pk in sorted(info, key=lambda column: column[5]) if pk]
+    return columns, primary_key
+
+def schema_layout(schema_sql):
+    """Return each table in schema_sql as {name: (create statement, columns, primary key)}."""
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.executescript(schema_sql)
+        return {
+            name: (sql, *table_layout(conn, name))
+            for name, sql in conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'")
+        }
+    finally:
+        conn.close()
+
+def migration_needed(conn, layout):
+    """Check whether any table is missing or lacks a column or key from layout."""
+    for table, (_, columns, primary_key) in layout.items():
+        existing, existing_key = table_layout(conn, table)
+        if existing_key != primary_key or not columns.keys() <= existing.keys():
+            return True
+    return False
+
+def migrate_tables(cursor, layout):
+    """Bring existing tables, e.g. from an older schema or another loader, up to layout.
+
+    Missing columns are added in place. A table whose primary key differs is
+    copied into a new table with the current layout, since SQLite can't alter
+    a primary key. Tables must already exist; run the CREATE TABLE IF NOT
+    EXISTS statements first.
+    """
+    for table, (create_sql, columns, primary_key) in layout.items():
+        existing, existing_key = table_layout(cursor, table)
+        if existing_key == primary_key:
+            for name, (col_type, default) in columns.items():
+                if name not in existing:
+                    logger.info(f"Adding column {name} to {table}")
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}"
+                                   + (f" DEFAULT {default}" if default is not None else ""))
+            continue
+
+        logger.info(f"Rebuilding {table} with primary key ({', '.join(primary_key)})")
+        copied = {}
+        for name in columns:
+            fallback = COLUMN_FALLBACKS.get(name)
+            if name in existing and fallback in existing:
+                copied[name] = f"COALESCE({name}, {fallback})"
+            elif name in existing:
+                copied[name] = name
+            elif fallback in existing:
+                copied[name] = fallback
+        cursor.execute(create_sql.replace(table, f"{table}_new", 1))
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO {table}_new ({", ".join(copied)})
+            SELECT {", ".join(copied.values())} FROM {table}
+        """)
+        cursor.execute(f"DROP TABLE {table}")
+        cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
@@ -0,0 +1,355 @@
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('fastf1')
+import populate_2025_data  # noqa: E402
+
+# driver_standings and constructors_standings as created before the sprint,
+# standardized-name and lap-time columns were added
+PREVIOUS_SCHEMA = """
+CREATE TABLE driver_standings (
+    year INTEGER,
+    round INTEGER,
+    driver_name TEXT,
+    team TEXT,
+    points INTEGER,
+    total_points INTEGER,
+    position INTEGER,
+    fastest_lap_time TEXT,
+    qualifying_position INTEGER,
+    positions_gained INTEGER,
+    pit_stops INTEGER,
+    driver_number INTEGER,
+    driver_color TEXT,
+    nationality TEXT,
+    sprint_points INTEGER DEFAULT 0,
+    PRIMARY KEY (year, round, driver_name)
+);
+
+CREATE TABLE constructors_standings (
+    year INTEGER,
+    round INTEGER,
+    team TEXT,
+    points INTEGER,
+    total_points INTEGER,
+    position INTEGER,
+    wins INTEGER,
+    podiums INTEGER,
+    fastest_laps INTEGER,
+    team_color TEXT,
+    sprint_position INTEGER DEFAULT NULL,
+    PRIMARY KEY (year, round, team)
+);
+"""
+
+
+def make_session(positions, teams, laps=None):
+    """Build a session-like object with results for drivers numbered from 1."""
+    numbers = [str(number) for number in range(1, len(positions) + 1)]
+    results = pd.DataFrame({
+        'DriverNumber': numbers,
+        'FullName': [f'Driver {number}' for number in numbers],
+        'TeamName': teams,
+        'Position': [float(position) for position in positions],
+        'TeamColor': ['3671C6'] * len(positions),
+    }, index=numbers)
+    return SimpleNamespace(results=results, laps=laps)
+
+
+def test_write_round_after_migrating_previous_schema():
+    conn = sqlite3.connect(':memory:')
+    conn.isolation_level = None
+    conn.executescript(PREVIOUS_SCHEMA)
+    conn.execute("""
+        INSERT INTO driver_standings (year, round, driver_name, team, points)
+        VALUES (2024, 1, 'Driver 9', 'Old Team', 10)
+    """)
+
+    populate_2025_data.init_tables(conn)
+
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(driver_standings)")}
+    assert {'standardized_driver_name', 'fastest_lap_us', 'fastest_lap_flag',
+            'is_sprint', 'sprint_position'} <= columns
+    assert conn.execute("SELECT version FROM schema_version").fetchall() == [
+        (populate_2025_data.get_schema_hash(),)
+    ]
+    # Existing rows survive the migration, keyed by their driver name
+    assert conn.execute("""
+        SELECT standardized_driver_name, points FROM driver_standings WHERE year = 2024
+    """).fetchall() == [('Driver 9', 10)]
+
+    laps = pd.DataFrame({
+        'DriverNumber': ['1', '2'],
+        'LapTime': pd.to_timedelta(['00:01:30', '00:01:31']),
+        'PitInTime': [pd.NaT, pd.NaT],
+    })
+    race = populate_2025_data.collect_results(make_session([1, 2], ['A', 'B'], laps), 1,
+                                              quali_positions={})
+    sprint = populate_2025_data.collect_results(make_session([2, 1], ['A', 'B']), 1,
+                                                is_sprint=True, quali_positions={})
+    cursor = conn.cursor()
+    cursor.execute("BEGIN")
+    populate_2025_data.write_round(2025, 1, race, sprint, cursor)
+    cursor.execute("COMMIT")
+
+    assert conn.execute("""
+        SELECT standardized_driver_name, points, position, fastest_lap_us,
+               is_sprint, sprint_points, sprint_position
+        FROM driver_standings WHERE year = 2025 ORDER BY standardized_driver_name
+    """).fetchall() == [
+        ('Driver 1', 25, 1, 90_000_000, 1, 7, 2),
+        ('Driver 2', 18, 2, 91_000_000, 1, 8, 1),
+    ]
+    assert conn.execute("""
+        SELECT team, points, position, is_sprint, sprint_points, sprint_position
+        FROM constructors_standings WHERE year = 2025 ORDER BY team
+    """).fetchall() == [
+        ('A', 25, 1, 1, 7, 2),
+        ('B', 18, 2, 1, 8, 1),
+    ]
+
+
+def test_init_tables_is_idempotent():
+    conn = sqlite3.connect(':memory:')
+    conn.isolation_level = None
+    populate_2025_data.init_tables(conn)
+    schema = conn.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall()
+
+    populate_2025_data.init_tables(conn)
+
+    assert conn.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall() == schema
+
+
+def test_collect_results_counts_pit_stops_from_laps():
+    laps = pd.DataFrame({
+        'DriverNumber': ['1', '1', '1', '2'],
+        'LapTime': pd.to_timedelta(['00:01:30', '00:01:35', '00:01:31', '00:01:32']),
+        'PitInTime': pd.to_timedelta([pd.NaT, '01:00:00', '01:20:00', pd.NaT]),
+    })
+    drivers = populate_2025_data.collect_results(make_session([1, 2, 3], ['A', 'B', 'C'], laps), 1,
+                                                 quali_positions={})
+
+    # Driver 3 has no laps, so they made no stops
+    assert drivers['pit_stops'].tolist() == [2, 0, 0]
+
+
+def test_collect_results_leaves_pit_stops_unknown_without_laps():
+    drivers = populate_2025_data.collect_results(make_session([1, 2], ['A', 'B']), 1,
+                                                 quali_positions={})
+
+    assert drivers['pit_stops'].tolist() == [None, None]
+
+
+def test_team_standings_share_position_on_equal_points():
+    # A and B both score 25 (25 + 0 and 15 + 10); C scores 18 + 12
+    drivers = populate_2025_data.collect_results(
+        make_session([1, 2, 3, 4, 5, 11], ['A', 'C', 'B', 'C', 'B', 'A']), 1, quali_positions={}
+    )
+
+    standings = populate_2025_data._team_standings(drivers)
+
+    assert standings['points'].to_dict() == {'A': 25, 'C': 30, 'B': 25}
+    assert standings['position'].to_dict() == {'A': 2, 'C': 1, 'B': 2}
+
+
+class FakeSession:
+    """Stands in for a FastF1 session whose load fills in results and laps."""
+
+    loads = 0
+
+    def __init__(self, positions):
+        self._session = make_session(positions, ['A'] * len(positions))
+
+    def load(self, **kwargs):
+        FakeSession.loads += 1
+        self.results = self._session.results
+        self.laps = pd.DataFrame(columns=populate_2025_data._LAP_COLUMNS)
+
+
+class FakeEvent:
+    """Stands in for a FastF1 event that has the given session types."""
+
+    def __init__(self, session_types):
+        self.session_types = session_types
+
+    def get_session(self, session_type):
+        if session_type not in self.session_types:
+            raise ValueError(f"Session type '{session_type}' does not exist for this event")
+        return FakeSession([1, 2])
+
+
+def test_parsed_results_cached_only_once_settled(tmp_path, monkeypatch):
+    monkeypatch.setattr(populate_2025_data, '_parsed_cache_dir', str(tmp_path))
+    monkeypatch.setattr(populate_2025_data.fastf1, 'get_event',
+                        lambda year, round_num: FakeEvent({'R'}), raising=False)
+    FakeSession.loads = 0
+    now = datetime.now()
+
+    # Provisional results are fetched every time and never written to disk
+    populate_2025_data.load_session_data(2025, 1, 'R', settled_at=now + timedelta(days=1))
+    populate_2025_data.load_session_data(2025, 1, 'R', settled_at=now + timedelta(days=1))
+    assert FakeSession.loads == 2
+    assert list(tmp_path.iterdir()) == []
+
+    # Settled results are parsed once and then read back
+    populate_2025_data.load_session_data(2025, 1, 'R', settled_at=now - timedelta(days=1))
+    session = populate_2025_data.load_session_data(2025, 1, 'R', settled_at=now - timedelta(days=1))
+    assert FakeSession.loads == 3
+    assert session.results['Position'].tolist() == [1.0, 2.0]
+
+    # A forced refresh skips the parsed copy
+    populate_2025_data.load_session_data(2025, 1, 'R', settled_at=now - timedelta(days=1), refresh=True)
+    assert FakeSession.loads == 4
+
+    # A copy written before the results settled is fetched again
+    written = (now - timedelta(days=2)).timestamp()
+    for path in tmp_path.iterdir():
+        os.utime(path, (written, written))
+    populate_2025_data.load_session_data(2025, 1, 'R', settled_at=now - timedelta(days=1))
+    assert FakeSession.loads == 5
+
+
+def test_only_sessions_missing_from_the_event_are_remembered(tmp_path, monkeypatch):
+    monkeypatch.setattr(populate_2025_data, '_parsed_cache_dir', str(tmp_path))
+    monkeypatch.setattr(populate_2025_data, '_known_misses', {})
+
+    def schedule_unavailable(year, round_num):
+        raise ValueError("Failed to load any schedule data.")
+
+    monkeypatch.setattr(populate_2025_data.fastf1, 'get_event', schedule_unavailable, raising=False)
+    assert populate_2025_data.load_session_data(2025, 1, 'S') is None
+    assert populate_2025_data._known_misses == {}
+
+    monkeypatch.setattr(populate_2025_data.fastf1, 'get_event',
+                        lambda year, round_num: FakeEvent({'R'}), raising=False)
+    assert populate_2025_data.load_session_data(2025, 1, 'S') is None
+    assert list(populate_2025_data._known_misses) == ['2025-1-S']
+
+
+def test_known_misses_expire(tmp_path, monkeypatch):
+    path = tmp_path / 'known_misses.json'
+    now = datetime.now()
+    path.write_text(json.dumps({
+        '2025-1-S': (now - timedelta(days=1)).timestamp(),
+        '2025-2-S': (now - timedelta(days=populate_2025_data.KNOWN_MISS_DAYS + 1)).timestamp(),
+    }))
+    monkeypatch.setattr(populate_2025_data, '_known_misses_path', str(path))
+
+    assert list(populate_2025_data._load_known_misses()) == ['2025-1-S']
+
+    # Files written before misses had a timestamp are discarded
+    path.write_text(json.dumps(['2025-1-S']))
+    assert populate_2025_data._load_known_misses() == {}
+
+
+def test_collect_results_builds_driver_rows():
+    session = make_session([1, 2, 11], ['A', 'B', 'C'], laps=pd.DataFrame({
+        'DriverNumber': ['1', '1', '2'],
+        'LapTime': pd.to_timedelta(['00:01:31', '00:01:30.5', pd.NaT]),
+        'PitInTime': [pd.NaT, pd.NaT, pd.NaT],
+    }))
+    session.results['FullName'] = ['Andrea Kimi Antonelli', 'Lando Norris', 'Driver 3']
+    session.results['TeamColor'] = ['#00D2BE', 'FF8000', '']
+    session.results['FastestLap'] = [False, True, False]
+
+    drivers = populate_2025_data.collect_results(session, 1, quali_positions={'1': 3.0, '2': 1.0})
+
+    assert drivers['standardized_driver_name'].tolist() == ['Kimi Antonelli', 'Lando Norris', 'Driver 3']
+    assert drivers['points'].tolist() == [25, 18, 0]
+    assert drivers['qualifying_position'].tolist() == [3, 1, 11]
+    assert drivers['positions_gained'].tolist() == [2, -1, 0]
+    assert drivers['driver_color'].tolist()[:2] == ['#00D2BE', '#FF8000']
+    assert pd.isna(drivers['driver_color'].iloc[2])
+    # Lap times come from the laps; the flag stands in when a driver has none
+    assert drivers['fastest_lap_us'].tolist()[0] == 90_500_000
+    assert drivers['fastest_lap_time'].tolist()[1:] == ['Fastest Lap', 'N/A']
+    assert drivers['fastest_lap_flag'].tolist() == [0, 1, 0]
+
+
+def test_collect_results_scores_sprints():
+    drivers = populate_2025_data.collect_results(make_session([1, 8, 9], ['A', 'B', 'C']), 1,
+                                                 is_sprint=True, quali_positions={})
+
+    assert drivers['points'].tolist() == [8, 1, 0]
+
+
+def write(conn, race=None, sprint=None):
+    cursor = conn.cursor()
+    cursor.execute("BEGIN")
+    populate_2025_data.write_round(2025, 1, race, sprint, cursor)
+    cursor.execute("COMMIT")
+
+
+def new_database():
+    conn = sqlite3.connect(':memory:')
+    conn.isolation_level = None
+    populate_2025_data.init_tables(conn)
+    return conn
+
+
+def test_write_round_keeps_the_other_session_when_one_is_written():
+    race = populate_2025_data.collect_results(make_session([1, 2], ['A', 'B']), 1, quali_positions={})
+    sprint = populate_2025_data.collect_results(make_session([2, 1], ['A', 'B']), 1,
+                                                is_sprint=True, quali_positions={})
+    query = """
+        SELECT standardized_driver_name, points, position, is_sprint, sprint_points, sprint_position
+        FROM driver_standings ORDER BY standardized_driver_name
+    """
+    team_query = """
+        SELECT team, points, position, wins, podiums, is_sprint, sprint_points, sprint_position
+        FROM constructors_standings ORDER BY team
+    """
+    expected = [
+        ('Driver 1', 25, 1, 1, 7, 2),
+        ('Driver 2', 18, 2, 1, 8, 1),
+    ]
+    expected_teams = [
+        ('A', 25, 1, 1, 1, 1, 7, 2),
+        ('B', 18, 2, 0, 1, 1, 8, 1),
+    ]
+
+    together = new_database()
+    write(together, race, sprint)
+    assert together.execute(query).fetchall() == expected
+    assert together.execute(team_query).fetchall() == expected_teams
+
+    # Writing the sessions separately, in either order, stores the same rows
+    for first, second in (({'sprint': sprint}, {'race': race}), ({'race': race}, {'sprint': sprint})):
+        conn = new_database()
+        write(conn, **first)
+        write(conn, **second)
+        assert conn.execute(query).fetchall() == expected
+        assert conn.execute(team_query).fetchall() == expected_teams
+
+
+def test_update_total_points_accumulates_race_and_sprint_points():
+    conn = new_database()
+    for round_num, race_positions, sprint_positions in ((1, [1, 2], None), (2, [2, 1], [1, 2])):
+        race = populate_2025_data.collect_results(make_session(race_positions, ['A', 'A']), round_num,
+                                                  quali_positions={})
+        sprint = sprint_positions and populate_2025_data.collect_results(
+            make_session(sprint_positions, ['A', 'A']), round_num, is_sprint=True, quali_positions={}
+        )
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        populate_2025_data.write_round(2025, round_num, race, sprint, cursor)
+        cursor.execute("COMMIT")
+
+    populate_2025_data.update_total_points(conn.cursor(), 2025)
+
+    assert conn.execute("""
+        SELECT round, standardized_driver_name, total_points FROM driver_standings
+        ORDER BY round, standardized_driver_name
+    """).fetchall() == [
+        (1, 'Driver 1', 25), (1, 'Driver 2', 18),
+        (2, 'Driver 1', 51), (2, 'Driver 2', 50),
+    ]
+    assert conn.execute("""
+        SELECT round, total_points FROM constructors_standings ORDER BY round
+    """).fetchall() == [(1, 43), (2, 101)]
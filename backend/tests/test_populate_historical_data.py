@@ -0,0 +1,102 @@
+import sqlite3
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('fastf1')
+import populate_historical_data  # noqa: E402
+
+# driver_standings as created before it had standardized_driver_name,
+# keyed on the driver name as FastF1 spells it
+PREVIOUS_SCHEMA = """
+CREATE TABLE driver_standings (
+    year INTEGER,
+    round INTEGER,
+    driver_name TEXT,
+    team TEXT,
+    points INTEGER,
+    position INTEGER,
+    fastest_lap_time TEXT,
+    qualifying_position INTEGER,
+    positions_gained INTEGER,
+    pit_stops INTEGER,
+    driver_number INTEGER,
+    driver_color TEXT,
+    nationality TEXT,
+    PRIMARY KEY (year, round, driver_name)
+);
+
+CREATE TABLE schema_version (
+    version TEXT PRIMARY KEY
+);
+"""
+
+
+def make_session():
+    """Build a race session-like object with two drivers on different teams."""
+    results = pd.DataFrame({
+        'DriverNumber': ['12', '4'],
+        'FullName': ['Andrea Kimi Antonelli', 'Lando Norris'],
+        'TeamName': ['Mercedes', 'McLaren'],
+        'TeamColor': ['00D2BE', 'FF8000'],
+        'Position': [1.0, 2.0],
+        'GridPosition': [2.0, 1.0],
+        'Points': [25.0, 18.0],
+    }, index=['12', '4'])
+    laps = pd.DataFrame({
+        'DriverNumber': ['12', '4'],
+        'LapTime': pd.to_timedelta(['00:01:30', '00:01:31']),
+    })
+    return SimpleNamespace(results=results, laps=laps)
+
+
+# The previous schema's version, and the current one recorded over the old
+# table layout by an earlier init_db that didn't migrate
+@pytest.mark.parametrize('recorded_version', ['previous', populate_historical_data.get_schema_hash()])
+def test_write_race_after_migrating_previous_schema(tmp_path, monkeypatch, recorded_version):
+    db_path = str(tmp_path / 'f1_data.db')
+    monkeypatch.setattr(populate_historical_data, 'DB_PATH', db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(PREVIOUS_SCHEMA)
+    conn.execute("INSERT INTO schema_version (version) VALUES (?)", (recorded_version,))
+    conn.execute("""
+        INSERT INTO driver_standings (year, round, driver_name, team, points)
+        VALUES (2023, 1, 'Lewis Hamilton', 'Mercedes', 25)
+    """)
+    conn.commit()
+    conn.close()
+
+    populate_historical_data.init_db()
+
+    conn = populate_historical_data.get_db_connection()
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(driver_standings)")}
+    assert 'standardized_driver_name' in columns
+    assert populate_historical_data.get_schema_hash() in {
+        row[0] for row in conn.execute("SELECT version FROM schema_version")
+    }
+    # Existing rows survive the migration, keyed by their driver name
+    assert [tuple(row) for row in conn.execute("""
+        SELECT standardized_driver_name, points FROM driver_standings WHERE year = 2023
+    """)] == [('Lewis Hamilton', 25)]
+
+    monkeypatch.setattr(populate_historical_data, 'load_race_session',
+                        lambda year, round_num, event_date: make_session())
+    schedule_row, driver_rows, team_rows = populate_historical_data.process_round(
+        2025, 1, 'Test GP', pd.Timestamp('2025-03-16'), 'conventional', 'Testland'
+    )
+    # Written the way populate_historical_data writes each race, twice to exercise the upsert
+    for _ in range(2):
+        with conn:
+            conn.execute(populate_historical_data._SQL_UPSERT_SCHEDULE, schedule_row)
+            populate_historical_data.insert_rows(conn, populate_historical_data._SQL_INSERT_DRIVER, driver_rows,
+                                                 suffix=populate_historical_data._SQL_UPSERT_DRIVER)
+
+    assert [tuple(row) for row in conn.execute("""
+        SELECT driver_name, standardized_driver_name, team, points, position
+        FROM driver_standings WHERE year = 2025 ORDER BY position
+    """)] == [
+        ('Andrea Kimi Antonelli', 'Kimi Antonelli', 'Mercedes', 25, 1),
+        ('Lando Norris', 'Lando Norris', 'McLaren', 18, 2),
+    ]
+    conn.close()
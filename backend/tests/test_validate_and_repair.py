@@ -0,0 +1,51 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip('fastf1')
+import validate_and_repair  # noqa: E402
+
+
+def test_update_total_points_accumulates_race_and_sprint_points():
+    conn = sqlite3.connect(':memory:')
+    conn.executescript("""
+        CREATE TABLE driver_standings (
+            year INTEGER, round INTEGER, driver_name TEXT, points INTEGER,
+            sprint_points INTEGER, total_points INTEGER
+        );
+        CREATE TABLE constructors_standings (
+            year INTEGER, round INTEGER, team TEXT, points INTEGER,
+            sprint_points INTEGER, total_points INTEGER
+        );
+    """)
+    conn.executemany("INSERT INTO driver_standings VALUES (?, ?, ?, ?, ?, 0)", [
+        (2025, 1, 'A', 25, 0),
+        (2025, 2, 'A', 18, 8),
+        (2025, 3, 'A', None, 0),  # left out of the sum
+        (2025, 4, 'A', 10, 0),
+        (2025, 1, 'B', None, 0),  # no total until B has points
+        (2025, 2, 'B', 12, 0),
+        (2024, 1, 'A', 100, 0),  # other seasons are untouched
+    ])
+    conn.executemany("INSERT INTO constructors_standings VALUES (?, ?, ?, ?, ?, 0)", [
+        (2025, 2, 'X', 30, 7),
+        (2025, 1, 'X', 43, 0),
+    ])
+
+    validate_and_repair.update_total_points(conn.cursor(), 2025)
+
+    assert conn.execute("""
+        SELECT year, round, driver_name, total_points FROM driver_standings
+        ORDER BY year, driver_name, round
+    """).fetchall() == [
+        (2024, 1, 'A', 0),
+        (2025, 1, 'A', 25),
+        (2025, 2, 'A', 51),
+        (2025, 3, 'A', 51),
+        (2025, 4, 'A', 61),
+        (2025, 1, 'B', None),
+        (2025, 2, 'B', 12),
+    ]
+    assert conn.execute("""
+        SELECT round, total_points FROM constructors_standings ORDER BY round
+    """).fetchall() == [(1, 43), (2, 80)]
@@ -4,11 +4,11 @@ import sqlite3
 import logging
 import os
 import time
-import hashlib
+import zlib
 import numpy as np
-import shutil
 from tqdm import tqdm
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from f1_backend import create_tables, get_db_connection, calculate_points
 from validate_and_repair import validate_sprint_data, repair_sprint_data
 
@@ -32,6 +32,25 @@ fastf1.Cache.enable_cache(cache_dir)
 db_path = os.path.join(os.path.dirname(__file__), 'data', 'f1_data.db')
 os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
+# Number of rounds fetched from FastF1 concurrently
+FETCH_WORKERS = 8
+
+# driver_standings columns written by process_race_data, in row order
+DRIVER_STANDINGS_COLUMNS = [
+    'year', 'round', 'driver_name', 'standardized_driver_name', 'team', 'points', 'total_points',
+    'position', 'fastest_lap_time', 'qualifying_position', 'positions_gained', 'pit_stops',
+    'driver_number', 'driver_color', 'nationality', 'is_sprint', 'sprint_points', 'sprint_position'
+]
+
+# Points by finishing position, precomputed from calculate_points;
+# position 0 holds unclassified drivers
+_MAX_POSITION = 30
+_RACE_POINTS = np.array([calculate_points(p) if p else 0.0 for p in range(_MAX_POSITION + 1)])
+_SPRINT_POINTS = np.array([calculate_points(p, is_sprint=True) if p else 0.0 for p in range(_MAX_POSITION + 1)])
+
+# Qualifying positions per (year, round), filled once per run
+_quali_cache = {}
+
 # Driver nationality mapping
 DRIVER_NATIONALITIES = {
     # 2025 Drivers
@@ -59,9 +78,100 @@ DRIVER_NATIONALITIES = {
     # Add more drivers as needed
 }
 
-def get_schema_hash():
-    """Calculate a hash of the current database schema."""
-    schema = """
+# Tables created by init_tables, run as one script
+_INIT_DB_SQL = """
+CREATE TABLE IF NOT EXISTS race_schedule (
+    year INTEGER,
+    round INTEGER,
+    name TEXT,
+    date TEXT,
+    qualifying_date TEXT,
+    sprint_date TEXT,
+    country TEXT,
+    is_sprint BOOLEAN DEFAULT 0,
+    PRIMARY KEY (year, round)
+);
+
+CREATE TABLE IF NOT EXISTS circuits (
+    year INTEGER,
+    round INTEGER,
+    circuit_name TEXT,
+    location TEXT,
+    country TEXT,
+    circuit_length REAL,
+    number_of_laps INTEGER,
+    first_grand_prix INTEGER,
+    lap_record TEXT,
+    track_map TEXT,
+    PRIMARY KEY (year, round)
+);
+
+CREATE TABLE IF NOT EXISTS driver_standings (
+    year INTEGER,
+    round INTEGER,
+    driver_name TEXT,
+    standardized_driver_name TEXT,
+    team TEXT,
+    points INTEGER,
+    total_points INTEGER,
+    position INTEGER,
+    fastest_lap_time TEXT,
+    qualifying_position INTEGER,
+    qualifying_time TEXT,
+    positions_gained INTEGER,
+    pit_stops INTEGER,
+    driver_number INTEGER,
+    driver_color TEXT,
+    nationality TEXT,
+    is_sprint INTEGER DEFAULT 0,
+    sprint_points INTEGER DEFAULT 0,
+    sprint_position INTEGER,
+    laps INTEGER,
+    status TEXT,
+    grid_position INTEGER,
+    fastest_lap_count INTEGER DEFAULT 0,
+    PRIMARY KEY (year, round, standardized_driver_name)
+);
+
+CREATE TABLE IF NOT EXISTS constructors_standings (
+    year INTEGER,
+    round INTEGER,
+    team TEXT,
+    points INTEGER,
+    total_points INTEGER,
+    position INTEGER,
+    wins INTEGER,
+    podiums INTEGER,
+    fastest_laps INTEGER,
+    team_color TEXT,
+    is_sprint INTEGER DEFAULT 0,
+    sprint_points INTEGER DEFAULT 0,
+    sprint_position INTEGER,
+    PRIMARY KEY (year, round, team)
+);
+
+CREATE TABLE IF NOT EXISTS schema_version (
+    version TEXT PRIMARY KEY
+);
+"""
+
+# Secondary indexes created by create_indexes once the tables are loaded
+_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_race_schedule_year ON race_schedule(year);
+CREATE INDEX IF NOT EXISTS idx_race_schedule_date ON race_schedule(date);
+CREATE INDEX IF NOT EXISTS idx_race_schedule_qualifying_date ON race_schedule(qualifying_date);
+CREATE INDEX IF NOT EXISTS idx_race_schedule_sprint_date ON race_schedule(sprint_date);
+CREATE INDEX IF NOT EXISTS idx_circuits_year ON circuits(year);
+CREATE INDEX IF NOT EXISTS idx_circuits_country ON circuits(country);
+CREATE INDEX IF NOT EXISTS idx_driver_standings_year ON driver_standings(year);
+CREATE INDEX IF NOT EXISTS idx_driver_standings_driver ON driver_standings(standardized_driver_name);
+CREATE INDEX IF NOT EXISTS idx_driver_standings_team ON driver_standings(team);
+CREATE INDEX IF NOT EXISTS idx_constructors_standings_year ON constructors_standings(year);
+CREATE INDEX IF NOT EXISTS idx_constructors_standings_team ON constructors_standings(team);
+"""
+
+# Schema fingerprinted by get_schema_hash
+_SCHEMA_SQL = """
     CREATE TABLE IF NOT EXISTS race_schedule (
         year INTEGER,
         round INTEGER,
@@ -132,7 +242,20 @@ def get_schema_hash():
         PRIMARY KEY (year, round, team)
     );
     """
-    return hashlib.md5(schema.encode()).hexdigest()
+_SCHEMA_HASH = format(zlib.crc32(_SCHEMA_SQL.encode()), '08x')
+
+def get_schema_hash():
+    """Return the hash of the current database schema."""
+    return _SCHEMA_HASH
+
+def tune_connection(conn):
+    """Apply per-connection PRAGMAs suited to a full rebuild."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-200000")  # ~200 MB
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA busy_timeout=5000")
 
 def needs_rebuild():
     """Check if the database needs to be rebuilt."""
@@ -140,19 +263,22 @@ def needs_rebuild():
         logger.info("Database file does not exist, needs to be rebuilt")
         return True
         
+    conn = None
     try:
         conn = sqlite3.connect(db_path)
+        tune_connection(conn)
         cursor = conn.cursor()
         
-        # Check if schema_version table exists
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='schema_version'")
-        if not cursor.fetchone():
-            logger.info("Schema version table not found, needs to be rebuilt")
+        # Get the schema version and 2025 schedule size in one round trip
+        try:
+            cursor.execute("""
+                SELECT (SELECT version FROM schema_version),
+                       (SELECT COUNT(*) FROM race_schedule WHERE year = 2025)
+            """)
+        except sqlite3.OperationalError:
+            logger.info("Schema version or race schedule table not found, needs to be rebuilt")
             return True
-            
-        # Get current schema version
-        cursor.execute("SELECT version FROM schema_version")
-        current_version = cursor.fetchone()[0]
+        current_version, race_count = cursor.fetchone()
         
         # Compare with current schema hash
         if current_version != get_schema_hash():
@@ -160,8 +286,7 @@ def needs_rebuild():
             return True
             
         # Check if we have data for 2025
-        cursor.execute("SELECT COUNT(*) FROM race_schedule WHERE year = 2025")
-        if cursor.fetchone()[0] == 0:
+        if race_count == 0:
             logger.info("No 2025 data found, needs to be rebuilt")
             return True
             
@@ -171,124 +296,43 @@ def needs_rebuild():
         logger.error(f"Error checking if rebuild is needed: {str(e)}")
         return True
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
-def init_db(db_path=None):
-    """Initialize the database with required tables."""
-    if db_path is None:
-        db_path = os.path.join(os.path.dirname(__file__), 'data', 'f1_data.db')
-        
-    conn = sqlite3.connect(db_path)
+def init_tables(cursor):
+    """Create the tables (without indexes) and record the schema version."""
+    # Create all tables in one script
+    cursor.executescript(_INIT_DB_SQL)
+    
+    # Store current schema version
+    cursor.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (?)", (get_schema_hash(),))
+
+def create_indexes(conn):
+    """Create secondary indexes and refresh planner statistics, run after bulk loading."""
+    conn.executescript(_INDEX_SQL)
+    conn.execute("ANALYZE")
+
+def init_db(db_path=None, conn=None, indexes=True):
+    """Initialize the database with required tables.
+    
+    Args:
+        db_path: Database file to initialize when no connection is given
+        conn: Open connection to initialize instead; left open for the caller
+        indexes: Create the secondary indexes too; bulk loads pass False and
+            call create_indexes once the data is in
+    """
+    owns_conn = conn is None
+    if owns_conn:
+        if db_path is None:
+            db_path = os.path.join(os.path.dirname(__file__), 'data', 'f1_data.db')
+        conn = sqlite3.connect(db_path)
+    tune_connection(conn)
     cursor = conn.cursor()
     
     try:
-        # Enable WAL mode for better concurrency
-        cursor.execute("PRAGMA journal_mode=WAL")
-        
-        # Create race_schedule table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS race_schedule (
-                year INTEGER,
-                round INTEGER,
-                name TEXT,
-                date TEXT,
-                qualifying_date TEXT,
-                sprint_date TEXT,
-                country TEXT,
-                is_sprint BOOLEAN DEFAULT 0,
-                PRIMARY KEY (year, round)
-            )
-        """)
-        
-        # Create circuits table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS circuits (
-                year INTEGER,
-                round INTEGER,
-                circuit_name TEXT,
-                location TEXT,
-                country TEXT,
-                circuit_length REAL,
-                number_of_laps INTEGER,
-                first_grand_prix INTEGER,
-                lap_record TEXT,
-                track_map TEXT,
-                PRIMARY KEY (year, round)
-            )
-        """)
-        
-        # Create driver_standings table with standardized_driver_name column
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS driver_standings (
-                year INTEGER,
-                round INTEGER,
-                driver_name TEXT,
-                standardized_driver_name TEXT,
-                team TEXT,
-                points INTEGER,
-                total_points INTEGER,
-                position INTEGER,
-                fastest_lap_time TEXT,
-                qualifying_position INTEGER,
-                qualifying_time TEXT,
-                positions_gained INTEGER,
-                pit_stops INTEGER,
-                driver_number INTEGER,
-                driver_color TEXT,
-                nationality TEXT,
-                is_sprint INTEGER DEFAULT 0,
-                sprint_points INTEGER DEFAULT 0,
-                sprint_position INTEGER,
-                laps INTEGER,
-                status TEXT,
-                grid_position INTEGER,
-                fastest_lap_count INTEGER DEFAULT 0,
-                PRIMARY KEY (year, round, standardized_driver_name)
-            )
-        """)
-        
-        # Create constructors_standings table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS constructors_standings (
-                year INTEGER,
-                round INTEGER,
-                team TEXT,
-                points INTEGER,
-                total_points INTEGER,
-                position INTEGER,
-                wins INTEGER,
-                podiums INTEGER,
-                fastest_laps INTEGER,
-                team_color TEXT,
-                is_sprint INTEGER DEFAULT 0,
-                sprint_points INTEGER DEFAULT 0,
-                sprint_position INTEGER,
-                PRIMARY KEY (year, round, team)
-            )
-        """)
-        
-        # Create schema_version table if it doesn't exist
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS schema_version (
-                version TEXT PRIMARY KEY
-            )
-        """)
-        
-        # Store current schema version
-        cursor.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (?)", (get_schema_hash(),))
-        
-        # Create indexes for better query performance
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_race_schedule_year ON race_schedule(year)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_race_schedule_date ON race_schedule(date)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_race_schedule_qualifying_date ON race_schedule(qualifying_date)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_race_schedule_sprint_date ON race_schedule(sprint_date)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_circuits_year ON circuits(year)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_circuits_country ON circuits(country)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_driver_standings_year ON driver_standings(year)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_driver_standings_driver ON driver_standings(standardized_driver_name)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_driver_standings_team ON driver_standings(team)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_constructors_standings_year ON constructors_standings(year)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_constructors_standings_team ON constructors_standings(team)")
+        init_tables(cursor)
+        if indexes:
+            create_indexes(conn)
         
         conn.commit()
         logger.info("Database initialized successfully")
@@ -297,20 +341,21 @@ def init_db(db_path=None):
         logger.error(f"Error initializing database: {str(e)}")
         conn.rollback()
     finally:
-        conn.close()
+        if owns_conn:
+            conn.close()
 
 def load_session_data(year, round_num, session_type='R'):
     """Load and cache session data efficiently."""
     try:
         session = fastf1.get_session(year, round_num, session_type)
-        logger.info(f"Loading {session_type} session data for Round {round_num}")
+        logger.debug("Loading %s session data for Round %s", session_type, round_num)
         
-        # Load all required data at once
+        # Only session.results is read here, so skip laps and telemetry
         session.load(
             weather=False,
             messages=False,
-            laps=True,
-            telemetry=True
+            laps=False,
+            telemetry=False
         )
         
         return session
@@ -318,6 +363,31 @@ def load_session_data(year, round_num, session_type='R'):
         logger.error(f"Error loading {session_type} session data for Round {round_num}: {str(e)}")
         return None
 
+# Driver name spellings mapped to the name stored in the database
+_NAME_MAP = {
+    'Andrea Kimi Antonelli': 'Kimi Antonelli',
+    'Kimi Antonelli': 'Kimi Antonelli',
+    'Isack Hadjar': 'Isack Hadjar',
+    'Gabriel Bortoleto': 'Gabriel Bortoleto',
+    'Jack Doohan': 'Jack Doohan',
+    'Liam Lawson': 'Liam Lawson',
+    'Yuki Tsunoda': 'Yuki Tsunoda',
+    'Pierre Gasly': 'Pierre Gasly',
+    'Fernando Alonso': 'Fernando Alonso',
+    'Carlos Sainz': 'Carlos Sainz',
+    'Lewis Hamilton': 'Lewis Hamilton',
+    'Charles Leclerc': 'Charles Leclerc',
+    'Lance Stroll': 'Lance Stroll',
+    'Esteban Ocon': 'Esteban Ocon',
+    'Oliver Bearman': 'Oliver Bearman',
+    'Nico Hulkenberg': 'Nico Hulkenberg',
+    'Alexander Albon': 'Alexander Albon',
+    'George Russell': 'George Russell',
+    'Oscar Piastri': 'Oscar Piastri',
+    'Lando Norris': 'Lando Norris',
+    'Max Verstappen': 'Max Verstappen'
+}
+
 def standardize_driver_name(name):
     """
     Standardize driver names to ensure consistency.
@@ -328,30 +398,7 @@ def standardize_driver_name(name):
     Returns:
         str: Standardized driver name
     """
-    name_mapping = {
-        'Andrea Kimi Antonelli': 'Kimi Antonelli',
-        'Kimi Antonelli': 'Kimi Antonelli',
-        'Isack Hadjar': 'Isack Hadjar',
-        'Gabriel Bortoleto': 'Gabriel Bortoleto',
-        'Jack Doohan': 'Jack Doohan',
-        'Liam Lawson': 'Liam Lawson',
-        'Yuki Tsunoda': 'Yuki Tsunoda',
-        'Pierre Gasly': 'Pierre Gasly',
-        'Fernando Alonso': 'Fernando Alonso',
-        'Carlos Sainz': 'Carlos Sainz',
-        'Lewis Hamilton': 'Lewis Hamilton',
-        'Charles Leclerc': 'Charles Leclerc',
-        'Lance Stroll': 'Lance Stroll',
-        'Esteban Ocon': 'Esteban Ocon',
-        'Oliver Bearman': 'Oliver Bearman',
-        'Nico Hulkenberg': 'Nico Hulkenberg',
-        'Alexander Albon': 'Alexander Albon',
-        'George Russell': 'George Russell',
-        'Oscar Piastri': 'Oscar Piastri',
-        'Lando Norris': 'Lando Norris',
-        'Max Verstappen': 'Max Verstappen'
-    }
-    return name_mapping.get(name, name)
+    return _NAME_MAP.get(name, name)
 
 def get_race_info(year, round):
     """Get race information from FastF1."""
@@ -447,279 +494,214 @@ def repair_sprint_data(conn, year, round_num, race_name):
             logger.error(f"Could not load sprint session for Round {round_num}")
             return False
         
-        # Start a transaction for this race
-        cursor.execute("BEGIN TRANSACTION")
+        # Build every driver's sprint row up front so they can be written in one batch
+        results = session.results
+        position = results['Position']
+        points = _SPRINT_POINTS[position.fillna(0).clip(0, _MAX_POSITION).astype(int)]
+        status = results['Status'] if 'Status' in results.columns else 'Finished'
+        staged = pd.DataFrame({
+            'year': year,
+            'round': round_num,
+            'driver_name': results['FullName'],
+            'standardized_driver_name': results['FullName'].map(_NAME_MAP).fillna(results['FullName']),
+            'team': results['TeamName'],
+            'points': 0,
+            'total_points': 0,
+            'position': None,
+            'status': status,
+            'is_sprint': 1,
+            'sprint_points': points,
+            'sprint_position': position
+        })
         
-        # Process each driver's sprint result
-        for _, driver in session.results.iterrows():
-            try:
-                driver_name = standardize_driver_name(driver['FullName'])
-                team = driver['TeamName']
-                position = int(driver['Position']) if pd.notna(driver['Position']) else None
-                status = driver['Status'] if 'Status' in driver else 'Finished'
-                
-                # Calculate sprint points
-                points = 0
-                if position is not None:
-                    if position == 1:
-                        points = 8
-                    elif position == 2:
-                        points = 7
-                    elif position == 3:
-                        points = 6
-                    elif position == 4:
-                        points = 5
-                    elif position == 5:
-                        points = 4
-                    elif position == 6:
-                        points = 3
-                    elif position == 7:
-                        points = 2
-                    elif position == 8:
-                        points = 1
-                
-                # First, try to update existing record
-                cursor.execute("""
-                    UPDATE driver_standings
-                    SET sprint_points = ?,
-                        sprint_position = ?,
-                        is_sprint = 1
-                    WHERE year = ? AND round = ? AND standardized_driver_name = ?
-                """, (points, position, year, round_num, driver_name))
-                
-                # If no record was updated, insert a new one
-                if cursor.rowcount == 0:
-                    cursor.execute("""
-                        INSERT INTO driver_standings (
-                            year, round, driver_name, standardized_driver_name, team,
-                            points, total_points, position, status, is_sprint,
-                            sprint_points, sprint_position
-                        )
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        year, round_num, driver['FullName'], driver_name, team,
-                        0, 0, None, status, 1,
-                        points, position
-                    ))
-                
-            except Exception as e:
-                logger.error(f"Error processing driver {driver.get('FullName', 'Unknown')}: {str(e)}")
-                continue
+        # Keep this race's writes atomic inside whatever transaction the caller has open
+        cursor.execute("SAVEPOINT repair_sprint")
+        try:
+            # Update existing rows and insert missing ones in a single upsert batch
+            cursor.executemany("""
+                INSERT INTO driver_standings (
+                    year, round, driver_name, standardized_driver_name, team,
+                    points, total_points, position, status, is_sprint,
+                    sprint_points, sprint_position
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(year, round, standardized_driver_name) DO UPDATE SET
+                    sprint_points = excluded.sprint_points,
+                    sprint_position = excluded.sprint_position,
+                    is_sprint = 1
+            """, staged.itertuples(index=False, name=None))
+        except Exception:
+            cursor.execute("ROLLBACK TO repair_sprint")
+            raise
+        finally:
+            cursor.execute("RELEASE repair_sprint")
         
-        # Commit the transaction for this race
-        conn.commit()
         logger.info(f"Successfully repaired sprint data for Round {round_num}")
         return True
         
     except Exception as e:
         logger.error(f"Error repairing sprint data for Round {round_num}: {str(e)}")
-        conn.rollback()
         return False
 
-def process_race_data(conn, year, round_num, race_type='race'):
-    """Process race data for both sprint and main race."""
+def process_race_data(conn, year, round_num, race_type='race', session=None, quali_positions=None):
+    """Process race data for both sprint and main race.
+    
+    session and quali_positions can be passed in when already fetched;
+    otherwise they are loaded for the round.
+    """
     try:
         cursor = conn.cursor()
         
         # Get race data
-        session = load_session_data(year, round_num, race_type)
+        if session is None:
+            session = load_session_data(year, round_num, race_type)
         if not session:
             logger.error(f"No session data found for {year} Round {round_num} ({race_type})")
             return
             
         # Get qualifying positions for positions gained calculation
-        quali_positions = get_qualifying_positions(year, round)
+        if quali_positions is None:
+            quali_positions = get_qualifying_positions(year, round_num)
         
-        # Process driver standings
-        driver_data = []
-        for _, driver in session.results.iterrows():
-            try:
-                driver_name = driver['FullName']
-                standardized_name = standardize_driver_name(driver_name)
-                team = driver['TeamName']
-                position = driver.get('Position', None)
-                status = driver.get('Status', 'Finished')
-                
-                # Calculate points based on race type
-                if race_type == 'sprint':
-                    points = calculate_points(position, is_sprint=True)
-                    race_points = 0
-                else:
-                    points = calculate_points(position, is_sprint=False)
-                    race_points = points
-                
-                # Calculate positions gained
-                quali_pos = quali_positions.get(driver['DriverNumber'], position)
-                positions_gained = quali_pos - position if position is not None else 0
-                
-                # Get driver color and nationality
-                driver_color = driver.get('TeamColor', '#000000')
-                nationality = DRIVER_NATIONALITIES.get(standardized_name, 'Unknown')
-                
-                # Create new record
-                driver_data.append((
-                    year, round_num, driver_name, standardized_name, team,
-                    race_points,  # race points
-                    0,  # total_points will be updated later
-                    None if race_type == 'sprint' else position,  # position (main race)
-                    driver.get('FastestLapTime', None), quali_pos, positions_gained,
-                    driver.get('PitStops', 0), driver['DriverNumber'], driver_color,
-                    nationality, race_type == 'sprint',
-                    points if race_type == 'sprint' else 0,  # sprint points
-                    position if race_type == 'sprint' else None  # sprint position
-                ))
-            except Exception as e:
-                logger.error(f"Error processing driver {driver.get('FullName', 'Unknown')}: {str(e)}")
-                continue
+        # Fill optional columns missing from some sessions
+        results = session.results
+        results = results.assign(**{
+            column: default
+            for column, default in (('Position', None), ('TeamColor', '#000000'),
+                                    ('FastestLapTime', None), ('PitStops', 0))
+            if column not in results.columns
+        })
         
-        # Process driver standings
-        for driver in driver_data:
-            try:
-                # Check if record exists
-                cursor.execute("""
-                    SELECT COUNT(*) FROM driver_standings 
-                    WHERE year = ? AND round = ? AND standardized_driver_name = ?
-                """, (driver[0], driver[1], driver[3]))
-                
-                if cursor.fetchone()[0] > 0:
-                    # Update existing record
-                    if race_type == 'race':
-                        cursor.execute('''
-                            UPDATE driver_standings 
-                            SET points = ?,
-                                position = ?,
-                                status = ?,
-                                is_sprint = 0
-                            WHERE year = ? AND round = ? AND standardized_driver_name = ?
-                        ''', (driver[5], driver[7], driver[8], driver[0], driver[1], driver[3]))
-                    else:  # sprint
-                        cursor.execute('''
-                            UPDATE driver_standings 
-                            SET sprint_points = ?,
-                                sprint_position = ?,
-                                is_sprint = 1
-                            WHERE year = ? AND round = ? AND standardized_driver_name = ?
-                        ''', (driver[6], driver[7], driver[0], driver[1], driver[3]))
-                else:
-                    # Insert new record
-                    cursor.execute('''
-                        INSERT INTO driver_standings 
-                        (year, round, driver_name, standardized_driver_name, team, points, total_points, position, 
-                         fastest_lap_time, qualifying_position, positions_gained, pit_stops, driver_number, 
-                         driver_color, nationality, is_sprint, sprint_points, sprint_position)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', driver)
-            except Exception as e:
-                logger.error(f"Error processing driver record: {str(e)}")
-                continue
+        # Build every driver row in one vectorized pass
+        is_sprint = race_type == 'sprint'
+        position = results['Position']
+        points_table = _SPRINT_POINTS if is_sprint else _RACE_POINTS
+        points = pd.Series(points_table[position.fillna(0).clip(0, _MAX_POSITION).astype(int)],
+                           index=results.index)
+        standardized_name = results['FullName'].map(_NAME_MAP).fillna(results['FullName'])
+        quali_pos = results['DriverNumber'].map(quali_positions).fillna(position)
+        staged = pd.DataFrame({
+            'year': year,
+            'round': round_num,
+            'driver_name': results['FullName'],
+            'standardized_driver_name': standardized_name,
+            'team': results['TeamName'],
+            'points': 0 if is_sprint else points,  # race points
+            'total_points': 0,  # total_points will be updated later
+            'position': None if is_sprint else position,  # position (main race)
+            'fastest_lap_time': results['FastestLapTime'],
+            'qualifying_position': quali_pos,
+            'positions_gained': quali_pos - position,
+            'pit_stops': results['PitStops'],
+            'driver_number': results['DriverNumber'],
+            'driver_color': results['TeamColor'],
+            'nationality': standardized_name.map(DRIVER_NATIONALITIES).fillna('Unknown'),
+            'is_sprint': is_sprint,
+            'sprint_points': points if is_sprint else 0,
+            'sprint_position': position if is_sprint else None
+        }, columns=DRIVER_STANDINGS_COLUMNS)
         
-        # Process team standings
-        team_data = {}
-        for driver in session.results['DriverNumber']:
-            result = session.results[session.results['DriverNumber'] == driver].iloc[0]
-            team = result['TeamName']
-            
-            if team not in team_data:
-                team_data[team] = {
-                    'points': 0,
-                    'sprint_points': 0,
-                    'position': result['Position'],
-                    'wins': 0,
-                    'podiums': 0,
-                    'fastest_laps': 0,
-                    'color': result['TeamColor']
-                }
-            
-            # Update team stats
-            if result['Position'] == 1:
-                team_data[team]['wins'] += 1
-            if result['Position'] <= 3:
-                team_data[team]['podiums'] += 1
-            
-            # Handle fastest lap points if available
-            try:
-                if result.get('FastestLap', False) and result.get('FastestLapRank', 0) == 1:
-                    team_data[team]['fastest_laps'] += 1
-                    if result['Position'] <= 10 and race_type == 'race':
-                        team_data[team]['points'] += 1  # Extra point for fastest lap if in top 10
-            except (KeyError, ValueError):
-                pass  # Ignore if FastestLap data is not available
-            
-            # Calculate points based on race type
+        # Keep this session's writes atomic inside whatever transaction the caller has open
+        cursor.execute("SAVEPOINT race_data")
+        try:
+            # Upsert this session's driver rows straight from the DataFrame in one batch
             if race_type == 'race':
-                team_data[team]['points'] += calculate_points(result['Position'], is_sprint=False)
+                conflict_update = """
+                    points = excluded.points,
+                    position = excluded.position,
+                    is_sprint = 0
+                """
             else:  # sprint
-                team_data[team]['sprint_points'] += calculate_points(result['Position'], is_sprint=True)
+                conflict_update = """
+                    sprint_points = excluded.sprint_points,
+                    sprint_position = excluded.sprint_position,
+                    is_sprint = 1
+                """
+            cursor.executemany(f"""
+                INSERT INTO driver_standings ({", ".join(DRIVER_STANDINGS_COLUMNS)})
+                VALUES ({", ".join("?" * len(DRIVER_STANDINGS_COLUMNS))})
+                ON CONFLICT(year, round, standardized_driver_name) DO UPDATE SET {conflict_update}
+            """, staged.itertuples(index=False, name=None))
         
-        # Process team standings
-        for team, data in team_data.items():
-            # Check if record exists
-            cursor.execute("""
-                SELECT COUNT(*) FROM constructors_standings 
-                WHERE year = ? AND round = ? AND team = ?
-            """, (year, round_num, team))
-            
-            if cursor.fetchone()[0] > 0:
-                # Update existing record
-                if race_type == 'race':
-                    cursor.execute('''
-                        UPDATE constructors_standings 
-                        SET points = ?,
-                            position = ?,
-                            wins = ?,
-                            podiums = ?,
-                            fastest_laps = ?,
-                            is_sprint = 0
-                        WHERE year = ? AND round = ? AND team = ?
-                    ''', (
-                        data['points'],
-                        data['position'],
-                        data['wins'],
-                        data['podiums'],
-                        data['fastest_laps'],
-                        year, round_num, team
-                    ))
-                else:  # sprint
-                    cursor.execute('''
-                        UPDATE constructors_standings 
-                        SET sprint_points = ?,
-                            sprint_position = ?,
-                            is_sprint = 1
-                        WHERE year = ? AND round = ? AND team = ?
-                    ''', (
-                        data['sprint_points'],
-                        data['position'],
-                        year, round_num, team
-                    ))
+            # Aggregate teams in one groupby, ranking them by points; sprints only
+            # score points, wins, podiums and fastest laps count for the race
+            if is_sprint:
+                team_standings = pd.DataFrame({
+                    'team': results['TeamName'],
+                    'points': points,
+                    'color': results['TeamColor']
+                }).groupby('team', sort=False).agg(
+                    points=('points', 'sum'), color=('color', 'first')
+                ).assign(wins=0, podiums=0, fastest_laps=0)
             else:
-                # Insert new record
-                cursor.execute('''
-                    INSERT INTO constructors_standings 
-                    (year, round, team, points, sprint_points, position, wins, podiums,
-                     fastest_laps, team_color, is_sprint, sprint_position)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    year, round_num, team,
-                    data['points'] if race_type == 'race' else 0,
-                    data['sprint_points'] if race_type == 'sprint' else 0,
-                    data['position'],
-                    data['wins'],
-                    data['podiums'],
-                    data['fastest_laps'],
-                    data['color'],
-                    1 if race_type == 'sprint' else 0,
-                    data['position'] if race_type == 'sprint' else None
-                ))
+                if {'FastestLap', 'FastestLapRank'}.issubset(results.columns):
+                    fastest_lap = results['FastestLap'].fillna(False).astype(bool) & results['FastestLapRank'].eq(1)
+                else:
+                    fastest_lap = pd.Series(False, index=results.index)
+                # Extra point for fastest lap if in top 10
+                bonus = (fastest_lap & position.le(10)).astype(int)
+                team_standings = pd.DataFrame({
+                    'team': results['TeamName'],
+                    'points': points + bonus,
+                    'win': position.eq(1),
+                    'podium': position.le(3),
+                    'fastest_lap': fastest_lap,
+                    'color': results['TeamColor']
+                }).groupby('team', sort=False).agg(
+                    points=('points', 'sum'), wins=('win', 'sum'), podiums=('podium', 'sum'),
+                    fastest_laps=('fastest_lap', 'sum'), color=('color', 'first')
+                )
+            team_standings['position'] = team_standings['points'].rank(ascending=False, method='min').astype(int)
         
-        # Update total points for both drivers and teams
-        update_total_points(cursor, year)
+            # Upsert all teams in one batch instead of probing for each one first
+            if race_type == 'race':
+                team_conflict_update = """
+                    points = excluded.points,
+                    position = excluded.position,
+                    wins = excluded.wins,
+                    podiums = excluded.podiums,
+                    fastest_laps = excluded.fastest_laps,
+                    is_sprint = 0
+                """
+            else:  # sprint
+                team_conflict_update = """
+                    sprint_points = excluded.sprint_points,
+                    sprint_position = excluded.sprint_position,
+                    is_sprint = 1
+                """
+            cursor.executemany(f"""
+                INSERT INTO constructors_standings
+                (year, round, team, points, sprint_points, position, wins, podiums,
+                 fastest_laps, team_color, is_sprint, sprint_position)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(year, round, team) DO UPDATE SET {team_conflict_update}
+            """, [
+                (
+                    year, round_num, team,
+                    0 if is_sprint else team_points,
+                    team_points if is_sprint else 0,
+                    None if is_sprint else team_position,
+                    wins,
+                    podiums,
+                    fastest_laps,
+                    color,
+                    1 if is_sprint else 0,
+                    team_position if is_sprint else None
+                )
+                for team, team_points, wins, podiums, fastest_laps, color, team_position
+                in team_standings[['points', 'wins', 'podiums', 'fastest_laps', 'color', 'position']]
+                .itertuples(name=None)
+            ])
+        except Exception:
+            cursor.execute("ROLLBACK TO race_data")
+            raise
+        finally:
+            cursor.execute("RELEASE race_data")
         
-        conn.commit()
         logger.info(f"Successfully processed {race_type} data for {year} Round {round_num}")
         
     except Exception as e:
         logger.error(f"Error processing {race_type} data for {year} Round {round_num}: {str(e)}")
-        conn.rollback()
         raise
 
 def validate_race_data(conn, year, round, race_type):
@@ -775,32 +757,42 @@ def update_total_points(cursor, year):
         year: Year to update points for
     """
     try:
-        # Update driver total points
+        # Update driver total points with one running-sum window pass
         cursor.execute('''
             UPDATE driver_standings
-            SET total_points = (
-                SELECT SUM(COALESCE(points, 0) + COALESCE(sprint_points, 0))
-                FROM driver_standings ds2
-                WHERE ds2.year = driver_standings.year
-                AND ds2.standardized_driver_name = driver_standings.standardized_driver_name
-                AND ds2.round <= driver_standings.round
-                AND ds2.year = ?
-            )
-            WHERE year = ?
+            SET total_points = t.running_total
+            FROM (
+                SELECT round, standardized_driver_name,
+                       SUM(COALESCE(points, 0) + COALESCE(sprint_points, 0)) OVER (
+                           PARTITION BY standardized_driver_name
+                           ORDER BY round
+                           ROWS UNBOUNDED PRECEDING
+                       ) AS running_total
+                FROM driver_standings
+                WHERE year = ?
+            ) AS t
+            WHERE driver_standings.year = ?
+            AND driver_standings.round = t.round
+            AND driver_standings.standardized_driver_name = t.standardized_driver_name
         ''', (year, year))
         
-        # Update constructor total points
+        # Update constructor total points with one running-sum window pass
         cursor.execute('''
             UPDATE constructors_standings
-            SET total_points = (
-                SELECT SUM(COALESCE(points, 0) + COALESCE(sprint_points, 0))
-                FROM constructors_standings cs2
-                WHERE cs2.year = constructors_standings.year
-                AND cs2.team = constructors_standings.team
-                AND cs2.round <= constructors_standings.round
-                AND cs2.year = ?
-            )
-            WHERE year = ?
+            SET total_points = t.running_total
+            FROM (
+                SELECT round, team,
+                       SUM(COALESCE(points, 0) + COALESCE(sprint_points, 0)) OVER (
+                           PARTITION BY team
+                           ORDER BY round
+                           ROWS UNBOUNDED PRECEDING
+                       ) AS running_total
+                FROM constructors_standings
+                WHERE year = ?
+            ) AS t
+            WHERE constructors_standings.year = ?
+            AND constructors_standings.round = t.round
+            AND constructors_standings.team = t.team
         ''', (year, year))
         
     except Exception as e:
@@ -828,7 +820,6 @@ def update_driver_nationalities(cursor):
                     WHERE driver_name = ?
                 """, (nationality, driver_name))
                 updated_count += 1
-                logger.info(f"Updated nationality for {driver_name} to {nationality}")
         
         logger.info(f"Updated nationalities for {updated_count} drivers")
         
@@ -912,123 +903,176 @@ def get_qualifying_positions(year, round):
         
     Returns:
         dict: Dictionary mapping driver numbers to their qualifying positions
+    
+    Each round is loaded at most once per run; sprint and race processing
+    share the result.
     """
+    key = (year, round)
+    if key in _quali_cache:
+        return _quali_cache[key]
+    
     try:
         session = fastf1.get_session(year, round, 'Q')
-        session.load()
+        session.load(laps=False, telemetry=False, weather=False, messages=False)
         
-        positions = {}
-        for _, driver in session.results.iterrows():
-            driver_number = driver['DriverNumber']
-            position = int(driver['Position']) if pd.notna(driver['Position']) else None
-            positions[driver_number] = position
+        positions = {
+            driver_number: int(position) if pd.notna(position) else None
+            for driver_number, position
+            in session.results[['DriverNumber', 'Position']].itertuples(index=False, name=None)
+        }
             
+        _quali_cache[key] = positions
         return positions
     except Exception as e:
         logger.error(f"Error getting qualifying positions for {year} Round {round}: {str(e)}")
+        _quali_cache[key] = {}
         return {}
 
+def fetch_round(round_num, has_sprint=False):
+    """Load the sprint (if any) and main race sessions and the qualifying positions for a round."""
+    sprint_session = None
+    if has_sprint:
+        sprint_session = load_session_data(2025, round_num, 'S')
+    race_session = load_session_data(2025, round_num, 'R')
+    quali_positions = get_qualifying_positions(2025, round_num)
+    return sprint_session, race_session, quali_positions
+
 def populate_2025_data():
     """Populate the database with 2025 F1 data."""
     try:
-        with get_db_connection() as conn:
+        # Build the season in an in-memory database so no journal or WAL I/O
+        # happens during ingest; the result is copied to disk once at the end
+        conn = sqlite3.connect(":memory:")
+        try:
+            tune_connection(conn)
             cursor = conn.cursor()
             
-            # Drop all existing tables to ensure clean schema
-            cursor.execute("DROP TABLE IF EXISTS race_schedule")
-            cursor.execute("DROP TABLE IF EXISTS driver_standings")
-            cursor.execute("DROP TABLE IF EXISTS constructors_standings")
-            cursor.execute("DROP TABLE IF EXISTS circuits")
-            cursor.execute("DROP TABLE IF EXISTS race_positions")
+            # Create tables with updated schema; indexes are built after the load
+            init_db(conn=conn, indexes=False)
             
-            # Create tables with updated schema
-            init_db()
+            # Manage transactions explicitly instead of sqlite3's implicit BEGIN;
+            # the whole season is loaded in one transaction with a savepoint per session
+            conn.isolation_level = None
+            cursor.execute("BEGIN")
             
-            # Get 2025 schedule
-            schedule = fastf1.get_event_schedule(2025)
-            logger.info(f"Schedule columns: {schedule.columns.tolist()}")
-            logger.info(f"First row: {schedule.iloc[0].to_dict()}")
+            # Get 2025 schedule (testing events share round 0 and are never processed)
+            schedule = fastf1.get_event_schedule(2025, include_testing=False)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Schedule columns: %s", schedule.columns.tolist())
+                logger.debug("First row: %s", schedule.iloc[0].to_dict())
+            
+            # Convert event dates once for the whole schedule
+            schedule['EventDay'] = pd.to_datetime(schedule['EventDate']).dt.normalize()
+            schedule['EventDateStr'] = schedule['EventDay'].dt.strftime('%Y-%m-%d')
             
             # Get current date
             current_date = datetime.now().date()
+            current_ts = pd.Timestamp(current_date)
             
-            # Process each race weekend
-            for _, event in schedule.iterrows():
-                round_num = event['RoundNumber']
-                race_date = event['EventDate'].date()
-                
-                # Find qualifying and sprint dates from session information
+            # Find qualifying and sprint dates from session information
+            qualifying_dates = []
+            sprint_dates = []
+            for event in schedule.itertuples(index=False):
                 qualifying_date = None
                 sprint_date = None
                 for i in range(1, 6):
-                    session_name = event[f'Session{i}']
-                    session_date = event[f'Session{i}Date']
+                    session_name = getattr(event, f'Session{i}')
+                    session_date = getattr(event, f'Session{i}Date')
                     if pd.notna(session_name) and pd.notna(session_date):
                         if 'Qualifying' in str(session_name):
                             qualifying_date = session_date.date()
                         elif 'Sprint' in str(session_name):
                             sprint_date = session_date.date()
-                
-                # Store race schedule for ALL races, including future ones
-                is_sprint_race = event['EventFormat'] in ['sprint', 'sprint_qualifying']
-                cursor.execute("""
-                    INSERT OR REPLACE INTO race_schedule
-                    (year, round, name, date, qualifying_date, sprint_date, country, is_sprint)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
+                qualifying_dates.append(qualifying_date)
+                sprint_dates.append(sprint_date)
+            schedule['QualifyingDate'] = qualifying_dates
+            schedule['SprintDate'] = sprint_dates
+            schedule['IsSprint'] = schedule['EventFormat'].isin(['sprint', 'sprint_qualifying'])
+            
+            # Store race schedule for ALL races, including future ones, in one batch.
+            # The table was just recreated, so a plain INSERT is enough.
+            cursor.executemany("""
+                INSERT INTO race_schedule
+                (year, round, name, date, qualifying_date, sprint_date, country, is_sprint)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (
                     2025,
-                    round_num,
-                    event['EventName'],
-                    event['EventDate'].strftime('%Y-%m-%d'),
-                    qualifying_date.strftime('%Y-%m-%d') if qualifying_date else None,
-                    sprint_date.strftime('%Y-%m-%d') if sprint_date else None,
-                    event['Country'],
-                    is_sprint_race
-                ))
-                
-                # Only process race data for races that have already happened
-                if race_date > current_date:
-                    logger.info(f"Skipping race data for Round {round_num} ({event['EventName']}) - Race hasn't happened yet (scheduled for {race_date})")
-                    continue
+                    int(event.RoundNumber),
+                    event.EventName,
+                    event.EventDateStr,
+                    event.QualifyingDate.strftime('%Y-%m-%d') if event.QualifyingDate else None,
+                    event.SprintDate.strftime('%Y-%m-%d') if event.SprintDate else None,
+                    event.Country,
+                    bool(event.IsSprint)
+                )
+                for event in schedule.itertuples(index=False)
+            ])
+            
+            # Only process race data for races that have already happened
+            is_past = (schedule['EventDay'] <= current_ts).to_numpy()
+            for event in schedule[~is_past].itertuples(index=False):
+                logger.info(f"Skipping race data for Round {event.RoundNumber} ({event.EventName}) - Race hasn't happened yet (scheduled for {event.EventDateStr})")
+            
+            # Fetch each race weekend that has already happened concurrently,
+            # writing to the database on this thread
+            past_events = {int(event.RoundNumber): event for event in schedule[is_past].itertuples(index=False)}
+            with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+                futures = {
+                    executor.submit(
+                        fetch_round, round_num,
+                        bool(event.IsSprint) and event.SprintDate is not None and event.SprintDate <= current_date
+                    ): round_num
+                    for round_num, event in past_events.items()
+                }
                 
-                try:
-                    # Process sprint race first if it exists
-                    if is_sprint_race and sprint_date and sprint_date <= current_date:
-                        logger.info(f"Loading sprint session for Round {round_num} ({event['EventName']})")
-                        sprint_session = fastf1.get_session(2025, round_num, 'S')
-                        if sprint_session:
-                            logger.info("Sprint session found, loading data...")
-                            sprint_session.load()
-                            logger.info("Processing sprint race data...")
-                            process_race_data(conn, 2025, round_num, 'sprint')
+                for future in as_completed(futures):
+                    round_num = futures[future]
+                    event_name = past_events[round_num].EventName
+                    
+                    try:
+                        sprint_session, race_session, quali_positions = future.result()
+                        
+                        # Process sprint race first if it exists
+                        if sprint_session is not None:
+                            logger.info(f"Processing sprint race data for Round {round_num} ({event_name})")
+                            process_race_data(conn, 2025, round_num, 'sprint',
+                                              session=sprint_session, quali_positions=quali_positions)
                             
                             # Validate and repair sprint data if needed
-                            if not validate_and_repair_sprint_data(conn, 2025, round_num, event['EventName']):
+                            if not validate_and_repair_sprint_data(conn, 2025, round_num, event_name):
                                 logger.info("Issues found in sprint data, attempting to repair...")
-                                repair_sprint_data(conn, 2025, round_num, event['EventName'])
+                                repair_sprint_data(conn, 2025, round_num, event_name)
+                        
+                        # Process main race
+                        if race_session is not None:
+                            logger.info(f"Processing main race data for Round {round_num} ({event_name})")
+                            process_race_data(conn, 2025, round_num, 'race',
+                                              session=race_session, quali_positions=quali_positions)
                         else:
-                            logger.warning("No sprint session found")
-                    
-                    # Process main race
-                    logger.info(f"Loading main race session for Round {round_num} ({event['EventName']})")
-                    race_session = fastf1.get_session(2025, round_num, 'R')
-                    if race_session:
-                        logger.info("Race session found, loading data...")
-                        race_session.load()
-                        logger.info("Processing main race data...")
-                        process_race_data(conn, 2025, round_num, 'race')
-                    else:
-                        logger.warning("No race session found")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing Round {round_num}: {str(e)}")
-                    continue
+                            logger.warning(f"No race session found for Round {round_num}")
+                        
+                    except Exception as e:
+                        logger.error(f"Error processing Round {round_num}: {str(e)}")
+                        continue
+            
+            # Total points are cumulative, so compute them once for the season
+            update_total_points(cursor, 2025)
             
             # Update driver nationalities
             logger.info("Updating driver nationalities...")
             update_driver_nationalities(cursor)
             
-            conn.commit()
+            cursor.execute("COMMIT")
+            
+            # Build each index in one pass over the loaded tables
+            create_indexes(conn)
+            
+            # Replace the live database contents in one sequential page copy
+            with get_db_connection() as live_conn:
+                conn.backup(live_conn)
+        finally:
+            conn.close()
             
         logger.info("Successfully populated 2025 data with nationalities")
         
@@ -1044,7 +1088,14 @@ def rebuild_database():
         # Backup the old database if it exists
         if os.path.exists(db_path):
             backup_path = f"{db_path}.backup"
-            shutil.copy2(db_path, backup_path)
+            src = sqlite3.connect(db_path)
+            dst = sqlite3.connect(backup_path)
+            try:
+                # Online Backup API copies a consistent snapshot, including WAL content
+                src.backup(dst)
+            finally:
+                dst.close()
+                src.close()
             logger.info(f"Created backup of existing database at {backup_path}")
         
         # Remove the old database
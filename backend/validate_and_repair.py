@@ -1,7 +1,8 @@
 import sqlite3
 import logging
 import time
-from f1_backend import get_db_connection, calculate_points, standardize_driver_name
+from concurrent.futures import ThreadPoolExecutor
+from f1_backend import get_db_connection, calculate_points, standardize_driver_name, FETCH_WORKERS
 import fastf1
 import os
 import pandas as pd
@@ -22,12 +23,12 @@ def load_session_data(year, round_num, session_type='R'):
         session = fastf1.get_session(year, round_num, session_type)
         logger.info(f"Loading {session_type} session data for Round {round_num}")
         
-        # Load all required data at once
+        # Only the results are read; laps and telemetry are skipped
         session.load(
             weather=False,
             messages=False,
-            laps=True,
-            telemetry=True
+            laps=False,
+            telemetry=False
         )
         
         return session
@@ -94,100 +95,101 @@ def repair_sprint_data():
             
             sprint_races = cursor.fetchall()
             
-            for year, round_num, race_name in sprint_races:
-                try:
-                    logger.info(f"Repairing sprint data for {race_name} (Round {round_num})")
+            # Load the sprint sessions concurrently; they are written on this thread in order
+            with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+                sessions = executor.map(lambda race: load_session_data(race[0], race[1], 'S'), sprint_races)
+                for (year, round_num, race_name), session in zip(sprint_races, sessions):
+                    try:
+                        logger.info(f"Repairing sprint data for {race_name} (Round {round_num})")
                     
-                    # Load sprint session data
-                    session = load_session_data(year, round_num, 'S')
-                    if not session:
-                        logger.error(f"Could not load sprint session for Round {round_num}")
-                        continue
+                        if not session:
+                            logger.error(f"Could not load sprint session for Round {round_num}")
+                            continue
                     
-                    # Start a transaction for this race
-                    cursor.execute("BEGIN TRANSACTION")
+                        # Start a transaction for this race
+                        cursor.execute("BEGIN TRANSACTION")
                     
-                    # Process each driver's sprint result
-                    for _, driver in session.results.iterrows():
-                        try:
-                            driver_name = standardize_driver_name(driver['FullName'])
-                            team = driver['TeamName']
-                            position = int(driver['Position']) if pd.notna(driver['Position']) else None
-                            status = driver['Status'] if 'Status' in driver else 'Finished'
-                            
-                            # Calculate sprint points
-                            points = 0
-                            if position is not None:
-                                if position == 1:
-                                    points = 8
-                                elif position == 2:
-                                    points = 7
-                                elif position == 3:
-                                    points = 6
-                                elif position == 4:
-                                    points = 5
-                                elif position == 5:
-                                    points = 4
-                                elif position == 6:
-                                    points = 3
-                                elif position == 7:
-                                    points = 2
-                                elif position == 8:
-                                    points = 1
+                        # Process each driver's sprint result
+                        for _, driver in session.results.iterrows():
+                            try:
+                                driver_name = standardize_driver_name(driver['FullName'])
+                                team = driver['TeamName']
+                                position = int(driver['Position']) if pd.notna(driver['Position']) else None
+                                status = driver['Status'] if 'Status' in driver else 'Finished'
                             
-                            # First, try to update existing record
-                            cursor.execute("""
-                                UPDATE driver_standings
-                                SET sprint_points = ?,
-                                    sprint_position = ?,
-                                    is_sprint = 1
-                                WHERE year = ? AND round = ? AND standardized_driver_name = ?
-                            """, (points, position, year, round_num, driver_name))
+                                # Calculate sprint points
+                                points = 0
+                                if position is not None:
+                                    if position == 1:
+                                        points = 8
+                                    elif position == 2:
+                                        points = 7
+                                    elif position == 3:
+                                        points = 6
+                                    elif position == 4:
+                                        points = 5
+                                    elif position == 5:
+                                        points = 4
+                                    elif position == 6:
+                                        points = 3
+                                    elif position == 7:
+                                        points = 2
+                                    elif position == 8:
+                                        points = 1
                             
-                            # If no record was updated, insert a new one
-                            if cursor.rowcount == 0:
+                                # First, try to update existing record
                                 cursor.execute("""
-                                    INSERT INTO driver_standings (
-                                        year, round, driver_name, standardized_driver_name, team,
-                                        points, total_points, position, status, is_sprint,
-                                        sprint_points, sprint_position
-                                    )
-                                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                                """, (
-                                    year, round_num, driver['FullName'], driver_name, team,
-                                    0, 0, None, status, 1,
-                                    points, position
-                                ))
+                                    UPDATE driver_standings
+                                    SET sprint_points = ?,
+                                        sprint_position = ?,
+                                        is_sprint = 1
+                                    WHERE year = ? AND round = ? AND standardized_driver_name = ?
+                                """, (points, position, year, round_num, driver_name))
                             
-                        except sqlite3.OperationalError as e:
-                            if "database is locked" in str(e):
-                                logger.warning(f"Database locked while processing {driver.get('FullName', 'Unknown')}, retrying...")
-                                time.sleep(1)  # Wait a bit before retrying
-                                continue
-                            else:
+                                # If no record was updated, insert a new one
+                                if cursor.rowcount == 0:
+                                    cursor.execute("""
+                                        INSERT INTO driver_standings (
+                                            year, round, driver_name, standardized_driver_name, team,
+                                            points, total_points, position, status, is_sprint,
+                                            sprint_points, sprint_position
+                                        )
+                                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                    """, (
+                                        year, round_num, driver['FullName'], driver_name, team,
+                                        0, 0, None, status, 1,
+                                        points, position
+                                    ))
+                            
+                            except sqlite3.OperationalError as e:
+                                if "database is locked" in str(e):
+                                    logger.warning(f"Database locked while processing {driver.get('FullName', 'Unknown')}, retrying...")
+                                    time.sleep(1)  # Wait a bit before retrying
+                                    continue
+                                else:
+                                    logger.error(f"Error processing driver {driver.get('FullName', 'Unknown')}: {str(e)}")
+                                    continue
+                            except Exception as e:
                                 logger.error(f"Error processing driver {driver.get('FullName', 'Unknown')}: {str(e)}")
                                 continue
-                        except Exception as e:
-                            logger.error(f"Error processing driver {driver.get('FullName', 'Unknown')}: {str(e)}")
-                            continue
                     
-                    # Commit the transaction for this race
-                    conn.commit()
-                    logger.info(f"Successfully repaired sprint data for Round {round_num}")
+                        # Commit the transaction for this race
+                        conn.commit()
+                        logger.info(f"Successfully repaired sprint data for Round {round_num}")
                     
-                except sqlite3.OperationalError as e:
-                    if "database is locked" in str(e):
-                        logger.warning(f"Database locked while processing Round {round_num}, retrying...")
-                        time.sleep(2)  # Wait longer before retrying the entire race
-                        continue
-                    else:
+                    except sqlite3.OperationalError as e:
+                        if "database is locked" in str(e):
+                            logger.warning(f"Database locked while processing Round {round_num}, retrying...")
+                            time.sleep(2)  # Wait longer before retrying the entire race
+                            continue
+                        else:
+                            logger.error(f"Error repairing sprint data for Round {round_num}: {str(e)}")
+                            conn.rollback()
+                            continue
+                    except Exception as e:
                         logger.error(f"Error repairing sprint data for Round {round_num}: {str(e)}")
                         conn.rollback()
                         continue
-                except Exception as e:
-                    logger.error(f"Error repairing sprint data for Round {round_num}: {str(e)}")
-                    conn.rollback()
-                    continue
             
             return True
             
@@ -195,34 +197,58 @@ def repair_sprint_data():
         logger.error(f"Error in repair_sprint_data: {str(e)}")
         return False
 
+def _running_totals(rows, key):
+    """Running points totals per key, as ((total, round, name), ...) update parameters.
+    
+    Matches SUM(points + sprint_points) over every round up to and including
+    each one: a NULL in either column leaves that row out of the sum, and the
+    total stays NULL until the key has a row that isn't.
+    """
+    frame = pd.DataFrame(rows, columns=['round', key, 'points'], dtype=object)
+    per_round = frame['points'].astype(float).groupby([frame[key], frame['round']]).sum(min_count=1)
+    scored = per_round.notna().groupby(level=0).cummax()
+    totals = per_round.fillna(0).groupby(level=0).cumsum().where(scored)
+    return [
+        (None if pd.isna(total) else total, round_num, name)
+        for (name, round_num), total in totals.items()
+    ]
+
 def update_total_points(cursor, year):
-    """Update total points for drivers and teams."""
+    """Update total points for drivers and teams.
+    
+    Running totals are computed in one pandas pass per table and written
+    back with executemany, instead of a correlated subquery per row.
+    """
     try:
         # Update driver total points
         cursor.execute("""
-            UPDATE driver_standings
-            SET total_points = (
-                SELECT SUM(points + sprint_points)
-                FROM driver_standings ds2
-                WHERE ds2.year = driver_standings.year
-                AND ds2.driver_name = driver_standings.driver_name
-                AND ds2.round <= driver_standings.round
-            )
+            SELECT round, driver_name, points + sprint_points
+            FROM driver_standings
             WHERE year = ?
         """, (year,))
+        cursor.executemany("""
+            UPDATE driver_standings
+            SET total_points = ?
+            WHERE year = ? AND round = ? AND driver_name = ?
+        """, [
+            (total_points, year, round_num, driver_name)
+            for total_points, round_num, driver_name in _running_totals(cursor.fetchall(), 'driver_name')
+        ])
         
         # Update team total points
         cursor.execute("""
-            UPDATE constructors_standings
-            SET total_points = (
-                SELECT SUM(points + sprint_points)
-                FROM constructors_standings cs2
-                WHERE cs2.year = constructors_standings.year
-                AND cs2.team = constructors_standings.team
-                AND cs2.round <= constructors_standings.round
-            )
+            SELECT round, team, points + sprint_points
+            FROM constructors_standings
             WHERE year = ?
         """, (year,))
+        cursor.executemany("""
+            UPDATE constructors_standings
+            SET total_points = ?
+            WHERE year = ? AND round = ? AND team = ?
+        """, [
+            (total_points, year, round_num, team)
+            for total_points, round_num, team in _running_totals(cursor.fetchall(), 'team')
+        ])
         
         logger.info("Successfully updated total points")
         